@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
@@ -8,14 +8,33 @@ from app.core.security import (
     verify_password,
     get_password_hash,
     create_access_token,
-    get_current_user
+    create_refresh_token,
+    decode_token,
+    revoke_token,
+    start_refresh_family,
+    rotate_refresh_token,
+    revoke_refresh_family,
+    get_current_user,
+    oauth2_scheme
 )
 from app.db.database import get_db
 from app.db import models
-from app.schemas.auth import UserSignup, UserLogin, Token, UserResponse
+from app.schemas.auth import UserSignup, Token, UserResponse, RefreshRequest, LogoutRequest
 
 router = APIRouter()
 
+def issue_tokens(user_id: int, family: str, generation: int = 0) -> dict:
+    access_token = create_access_token(
+        data={"sub": str(user_id)},
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(user_id, family, generation),
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
     # Check if user exists
@@ -61,16 +80,38 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
-    )
+    return issue_tokens(user.id, start_refresh_family())
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for new tokens without re-entering the password.
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    Refresh tokens are single use: the new one supersedes the presented one,
+    and presenting a superseded token revokes every token of its login.
+    """
+    payload = decode_token(request.refresh_token, "refresh")
+    user = payload and db.query(models.User).filter(models.User.id == int(payload["sub"])).first()
+    if not user or not rotate_refresh_token(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return issue_tokens(user.id, payload["fam"], payload["gen"] + 1)
 
 @router.post("/logout")
-async def logout(current_user: models.User = Depends(get_current_user)):
-    # In a stateless JWT system, logout is handled client-side
+async def logout(
+    request: LogoutRequest = Body(default=LogoutRequest()),
+    token: str = Depends(oauth2_scheme),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Revoke the access token and, if given, the refresh token with its whole family."""
+    revoke_token(decode_token(token))
+    if request.refresh_token:
+        payload = decode_token(request.refresh_token, "refresh")
+        if payload and payload["sub"] == str(current_user.id):
+            revoke_refresh_family(payload)
     return {"message": "Successfully logged out"}
 
 @router.get("/user", response_model=UserResponse)
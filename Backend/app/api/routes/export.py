@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import csv
@@ -7,8 +7,11 @@ import io
 from pydantic import BaseModel
 
 from app.db.database import get_db
-from app.core.security import get_current_user
+from app.core.config import settings
+from app.core.security import get_current_user, create_calendar_token, decode_calendar_token, revoke_token
+from app.core.http_cache import make_etag, etag_matches, not_modified, set_cache_headers
 from app.db import models
+from app.services.calendar_feed import feed_cache, feed_state, iter_feed
 
 router = APIRouter()
 
@@ -79,3 +82,84 @@ END:VCALENDAR"""
         media_type="text/calendar",
         headers={"Content-Disposition": "attachment; filename=event.ics"}
     )
+
+class CalendarTokenRequest(BaseModel):
+    token: str
+
+def calendar_subscription(request: Request, user_id: int) -> dict:
+    token = create_calendar_token(user_id)
+    return {
+        "token": token,
+        "url": str(request.url_for("calendar_feed", token=token))
+    }
+
+def revoke_calendar_token(token: str, user_id: int):
+    payload = decode_calendar_token(token)
+    if payload is None or payload["sub"] != str(user_id):
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    revoke_token(payload)
+
+@router.get("/calendar/token")
+async def get_calendar_token(
+    request: Request,
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get the private subscription URL of the user's trip calendar."""
+    return calendar_subscription(request, current_user.id)
+
+@router.post("/calendar/token/rotate")
+async def rotate_calendar_token(
+    token_data: CalendarTokenRequest,
+    request: Request,
+    current_user: models.User = Depends(get_current_user)
+):
+    """Revoke a subscription URL and issue a new one in its place."""
+    revoke_calendar_token(token_data.token, current_user.id)
+    return calendar_subscription(request, current_user.id)
+
+@router.post("/calendar/token/revoke", status_code=204)
+async def revoke_calendar_subscription(
+    token_data: CalendarTokenRequest,
+    current_user: models.User = Depends(get_current_user)
+):
+    """Revoke a subscription URL, e.g. one that was shared by mistake."""
+    revoke_calendar_token(token_data.token, current_user.id)
+    return Response(status_code=204)
+
+@router.get("/calendar/{token}.ics", name="calendar_feed")
+async def calendar_feed(
+    token: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """iCalendar feed of all trips with their latest weather outlook.
+    
+    Authenticated by the token in the URL, since calendar clients cannot send
+    bearer tokens. Polls are answered with 304 while nothing has changed.
+    """
+    payload = decode_calendar_token(token)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    user_id = int(payload["sub"])
+    
+    # No Last-Modified: deleting a trip moves no timestamp, only the count
+    count, changed = feed_state(db, user_id)
+    etag = make_etag("calendar", user_id, count, changed)
+    cache_control = f"private, max-age={settings.CALENDAR_FEED_MAX_AGE}"
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    
+    cached = feed_cache.get(etag)
+    if cached is not None:
+        response = Response(content=cached, media_type="text/calendar; charset=utf-8")
+    else:
+        def stream_and_cache():
+            chunks = []
+            for chunk in iter_feed(user_id):
+                chunks.append(chunk)
+                yield chunk
+            feed_cache.set(etag, "".join(chunks).encode("utf-8"))
+        response = StreamingResponse(stream_and_cache(), media_type="text/calendar; charset=utf-8")
+    
+    set_cache_headers(response, etag, cache_control)
+    return response
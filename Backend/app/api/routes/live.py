@@ -0,0 +1,137 @@
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.security import (
+    create_live_ticket,
+    decode_token,
+    get_current_user,
+    oauth2_scheme,
+    revoke_token,
+    session_active
+)
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.live_dashboard import Subscriber, encode, hub
+
+router = APIRouter()
+
+# Close code for evicted slow consumers (RFC 6455 "Try Again Later")
+TRY_AGAIN_LATER = 1013
+
+def authenticate(ticket: str) -> Optional[Dict]:
+    """Payload of a valid live ticket, which is used up; else None."""
+    payload = decode_token(ticket, "live_ticket")
+    if payload is None or not session_active(payload):
+        return None
+    revoke_token(payload)
+    db = SessionLocal()
+    try:
+        user = db.query(models.User.id).filter(models.User.id == int(payload["sub"])).first()
+    finally:
+        db.close()
+    return payload if user is not None else None
+
+async def watch_session(ticket: Dict):
+    """Return once the access token behind the socket expires or is revoked."""
+    while session_active(ticket):
+        delay = settings.LIVE_REFRESH_SECONDS
+        if ticket.get("session_exp") is not None:
+            delay = min(delay, max(0.0, ticket["session_exp"] - time.time()))
+        await asyncio.sleep(delay)
+
+@router.post("/ticket")
+async def live_ticket(
+    token: str = Depends(oauth2_scheme),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Ticket for opening the dashboard socket, valid once for LIVE_TICKET_SECONDS."""
+    return {
+        "ticket": create_live_ticket(decode_token(token)),
+        "expires_in": settings.LIVE_TICKET_SECONDS
+    }
+
+async def receive_commands(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        try:
+            command = await websocket.receive_json()
+        except WebSocketDisconnect:
+            return
+        except ValueError:
+            subscriber.offer(encode({"type": "error", "detail": "Messages must be JSON"}))
+            continue
+
+        action = command.get("action") if isinstance(command, dict) else None
+        location = str(command.get("location") or "").strip() if action else ""
+        date = str(command.get("date") or "")
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            date = ""
+        if action not in ("subscribe", "unsubscribe") or not location or not date:
+            subscriber.offer(encode({
+                "type": "error",
+                "detail": 'Expected {"action": "subscribe" | "unsubscribe", "location": ..., "date": "YYYY-MM-DD"}'
+            }))
+            continue
+
+        if action == "unsubscribe":
+            hub.unsubscribe(subscriber, location, date)
+        elif not hub.subscribe(subscriber, location, date):
+            subscriber.offer(encode({
+                "type": "error", "location": location, "date": date,
+                "detail": "Too many subscriptions on this connection"
+            }))
+
+@router.websocket("/dashboard")
+async def live_dashboard(websocket: WebSocket, ticket: str = Query(...)):
+    """
+    Live probabilities and reports for the dashboard.
+
+    Browsers cannot set headers on WebSockets, so instead of the access token
+    the URL carries a single-use ``ticket`` from ``POST /api/live/ticket``,
+    which expires within seconds even if it ends up in access logs. The
+    socket is closed with code 1008 once the access token the ticket was
+    issued for expires or is revoked. Send
+    ``{"action": "subscribe", "location": "Goa", "date": "2024-06-01"}`` (or
+    ``"unsubscribe"``) to follow a topic. The server answers with a
+    ``snapshot`` of the analysis and recent reports, then ``update`` messages
+    holding only the fields that changed. Clients that fall too far behind
+    are disconnected with close code 1013.
+    """
+    payload = await asyncio.to_thread(authenticate, ticket)
+    if payload is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    subscriber = Subscriber(websocket)
+    session = asyncio.create_task(watch_session(payload))
+    tasks = [
+        asyncio.create_task(receive_commands(websocket, subscriber)),
+        asyncio.create_task(subscriber.send_forever()),
+        asyncio.create_task(subscriber.evicted.wait()),
+        session
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        hub.disconnect(subscriber)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if subscriber.evicted.is_set():
+        code, reason = TRY_AGAIN_LATER, "Slow consumer"
+    elif session.done() and not session.cancelled():
+        code, reason = status.WS_1008_POLICY_VIOLATION, "Session expired or revoked"
+    else:
+        return
+    try:
+        await websocket.close(code=code, reason=reason)
+    except RuntimeError:
+        # The client went away first
+        pass
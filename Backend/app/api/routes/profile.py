@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Dict
 
 from app.db.database import get_db
 from app.core.security import get_current_user
+from app.core.http_cache import make_etag, etag_matches, not_modified, set_cache_headers
 from app.db import models
 from app.schemas.auth import UserResponse
 
@@ -19,10 +20,18 @@ class PreferencesUpdate(BaseModel):
 
 @router.get("", response_model=UserResponse)
 async def get_profile(
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get current user profile."""
+    # User rows carry no update timestamp, so tag the returned fields themselves
+    etag = make_etag("profile", current_user.id, current_user.email, current_user.username)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    set_cache_headers(response, etag)
     return current_user
 
 @router.put("", response_model=UserResponse)
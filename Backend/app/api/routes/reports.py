@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date as Date, datetime
 
 from app.db.database import get_db
 from app.core.security import get_current_user
+from app.core.http_cache import make_etag, etag_matches, not_modified, set_cache_headers
 from app.db import models
+from app.services import report_archive, report_rollups
 
 router = APIRouter()
 
@@ -40,22 +43,72 @@ class ReportResponse(BaseModel):
 
 @router.get("", response_model=List[ReportResponse])
 async def get_reports(
+    request: Request,
+    response: Response,
     location: str = None,
     date: str = None,
+    include_archive: bool = Query(False, description="Without a date, also return archived reports"),
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get reports for a location/date."""
-    query = db.query(models.Report)
+    """Get reports for a location/date.
     
-    if location:
-        query = query.filter(models.Report.location.ilike(f"%{location}%"))
+    Recent queries only touch the reports table; archived months are read
+    only when ``date`` reaches back into them or ``include_archive`` is set.
+    """
+    date_from = None
     if date:
-        query = query.filter(models.Report.report_date >= date)
+        try:
+            date_from = report_archive.naive_utc(datetime.fromisoformat(date))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="date must be an ISO 8601 date")
+    
+    filters = []
+    if location:
+        filters.append(models.Report.location.ilike(f"%{location}%"))
+    if date_from:
+        filters.append(models.Report.report_date >= date_from)
     
-    reports = query.all()
+    months = report_archive.months_reached(date_from) if date_from or include_archive else []
+    count, last_updated = db.query(func.count(models.Report.id), func.max(models.Report.updated_at)).filter(*filters).one()
+    etag = make_etag(
+        "reports", location, date, include_archive, count, last_updated, report_archive.archive_version(months)
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    reports = db.query(models.Report).filter(*filters).all()
+    reports += report_archive.query_archive(months, location, date_from)
+    set_cache_headers(response, etag)
     return reports
 
+@router.get("/stats")
+async def get_report_stats(
+    request: Request,
+    response: Response,
+    latitude: float,
+    longitude: float,
+    date: Date,
+    days: int = Query(None, ge=0, le=31, description="Days either side of the date (default DAYS_RANGE)"),
+    years: int = Query(None, ge=0, le=50, description="Past years to include (default HISTORICAL_YEARS)"),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Observed-condition frequencies from community reports near a location.
+    
+    Counts come from the grid cell containing the point, for the same calendar
+    days across years, and are read from precomputed rollups.
+    """
+    stats = report_rollups.observed_frequencies(
+        db, latitude, longitude, datetime.combine(date, datetime.min.time()), days, years
+    )
+    etag = make_etag("report-stats", stats)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    set_cache_headers(response, etag)
+    return stats
+
 @router.post("", response_model=ReportResponse, status_code=status.HTTP_201_CREATED)
 async def create_report(
     report_data: ReportCreate,
@@ -65,6 +118,7 @@ async def create_report(
     """Submit a user report."""
     new_report = models.Report(**report_data.dict(), user_id=current_user.id)
     db.add(new_report)
+    report_rollups.add_report(db, new_report)
     db.commit()
     db.refresh(new_report)
     return new_report
@@ -85,8 +139,14 @@ async def update_report(
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    for key, value in report_data.dict(exclude_unset=True).items():
+    updates = report_data.dict(exclude_unset=True)
+    rollup_changed = "weather_conditions" in updates
+    if rollup_changed:
+        report_rollups.remove_report(db, report)
+    for key, value in updates.items():
         setattr(report, key, value)
+    if rollup_changed:
+        report_rollups.add_report(db, report)
     
     db.commit()
     db.refresh(report)
@@ -107,6 +167,7 @@ async def delete_report(
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
+    report_rollups.remove_report(db, report)
     db.delete(report)
     db.commit()
     return None
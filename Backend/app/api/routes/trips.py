@@ -1,21 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Request, Response, UploadFile, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List
 
 from app.db.database import get_db
+from app.core.config import settings
 from app.core.security import get_current_user
+from app.core.http_cache import make_etag, etag_matches, not_modified, set_cache_headers
 from app.db import models
-from app.schemas.trips import TripCreate, TripUpdate, TripResponse
+from app.schemas.trips import TripCreate, TripUpdate, TripResponse, TripBulkUpdate, BulkTripResponse
+from app.services.trip_import import parse_trips_csv, parse_trips_ical
 
 router = APIRouter()
 
+trip_list_adapter = TypeAdapter(List[TripCreate])
+
+def check_bulk_size(count: int):
+    if count > settings.BULK_TRIPS_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_TRIPS_MAX} trips per request"
+        )
+
+def insert_trips(db: Session, trips: List[TripCreate], user_id: int) -> List[int]:
+    """Insert all trips in one transaction.
+
+    Uses a single executemany INSERT ... RETURNING where the database can
+    return ids in parameter order, and ORM inserts otherwise (e.g. MySQL).
+    """
+    if not trips:
+        return []
+    rows = [{**trip.model_dump(), "user_id": user_id} for trip in trips]
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        ids = list(db.scalars(
+            insert(models.Trip).returning(models.Trip.id, sort_by_parameter_order=True),
+            rows
+        ).all())
+    else:
+        new_trips = [models.Trip(**row) for row in rows]
+        db.add_all(new_trips)
+        db.flush()
+        ids = [trip.id for trip in new_trips]
+    db.commit()
+    return ids
+
 @router.get("", response_model=List[TripResponse])
 async def list_trips(
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """List all trips for the current user."""
+    # Any insert, update or delete changes the count or the latest update time
+    count, last_updated = db.query(func.count(models.Trip.id), func.max(models.Trip.updated_at)).filter(
+        models.Trip.user_id == current_user.id
+    ).one()
+    etag = make_etag("trips", current_user.id, count, last_updated)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     trips = db.query(models.Trip).filter(models.Trip.user_id == current_user.id).all()
+    set_cache_headers(response, etag)
     return trips
 
 @router.post("", response_model=TripResponse, status_code=status.HTTP_201_CREATED)
@@ -31,9 +79,75 @@ async def create_trip(
     db.refresh(new_trip)
     return new_trip
 
+@router.post("/bulk", response_model=BulkTripResponse, status_code=status.HTTP_201_CREATED)
+async def create_trips_bulk(
+    trips_data: List[TripCreate] = Body(..., max_length=settings.BULK_TRIPS_MAX),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create many trips in a single transaction."""
+    ids = insert_trips(db, trips_data, current_user.id)
+    return {"ids": ids, "count": len(ids)}
+
+@router.post("/import", response_model=BulkTripResponse, status_code=status.HTTP_201_CREATED)
+async def import_trips(
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Import trips from a CSV or iCalendar (.ics) file."""
+    # Read one byte past the limit to tell a full-size file from a larger one
+    data = await file.read(settings.BULK_IMPORT_MAX_BYTES + 1)
+    if len(data) > settings.BULK_IMPORT_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Import files may be at most {settings.BULK_IMPORT_MAX_BYTES} bytes"
+        )
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=422, detail="Import files must be UTF-8 encoded")
+    is_ical = (file.filename or "").lower().endswith(".ics") or "calendar" in (file.content_type or "")
+    rows = parse_trips_ical(text) if is_ical else parse_trips_csv(text)
+    check_bulk_size(len(rows))
+
+    try:
+        trips = trip_list_adapter.validate_python(rows)
+    except ValidationError as e:
+        # Report every invalid row at once, located as ("file", row, field)
+        raise RequestValidationError([{**error, "loc": ("file", *error["loc"])} for error in e.errors()])
+
+    ids = insert_trips(db, trips, current_user.id)
+    return {"ids": ids, "count": len(ids)}
+
+@router.patch("/bulk", response_model=BulkTripResponse)
+async def update_trips_bulk(
+    updates: List[TripBulkUpdate] = Body(..., max_length=settings.BULK_TRIPS_MAX),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Update many trips in a single transaction."""
+    ids = [trip_update.id for trip_update in updates]
+    owned = {row.id for row in db.query(models.Trip.id).filter(
+        models.Trip.id.in_(ids),
+        models.Trip.user_id == current_user.id
+    )}
+    missing = [trip_id for trip_id in ids if trip_id not in owned]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Trips not found: {missing}")
+
+    # Bulk UPDATE by primary key, grouped by SQLAlchemy into executemany batches
+    rows: List[Dict] = [trip_update.model_dump(exclude_unset=True) for trip_update in updates]
+    if any(len(row) > 1 for row in rows):
+        db.execute(update(models.Trip), [row for row in rows if len(row) > 1])
+    db.commit()
+    return {"ids": ids, "count": len(ids)}
+
 @router.get("/{trip_id}", response_model=TripResponse)
 async def get_trip(
     trip_id: int,
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -42,10 +156,15 @@ async def get_trip(
         models.Trip.id == trip_id,
         models.Trip.user_id == current_user.id
     ).first()
-    
+
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
-    
+
+    etag = make_etag("trip", trip.id, trip.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    set_cache_headers(response, etag)
     return trip
 
 @router.put("/{trip_id}", response_model=TripResponse)
@@ -60,13 +179,13 @@ async def update_trip(
         models.Trip.id == trip_id,
         models.Trip.user_id == current_user.id
     ).first()
-    
+
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
-    
+
     for key, value in trip_data.dict(exclude_unset=True).items():
         setattr(trip, key, value)
-    
+
     db.commit()
     db.refresh(trip)
     return trip
@@ -82,10 +201,10 @@ async def delete_trip(
         models.Trip.id == trip_id,
         models.Trip.user_id == current_user.id
     ).first()
-    
+
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
-    
+
     db.delete(trip)
     db.commit()
     return None
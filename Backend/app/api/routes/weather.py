@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 import io
 import base64
@@ -14,20 +14,35 @@ from app.schemas.weather import (
     WeatherHistoryResponse,
     HourlyProbability
 )
-from app.services.weather_service import WeatherService
+from app.core.config import settings
+from app.core.http_cache import make_etag, etag_matches, not_modified, set_cache_headers, climatology_cache_control
+from app.core.responses import JSON_TYPE, negotiate_format, negotiated_response
+from app.services.weather_service import WeatherService, hourly_records
 
 router = APIRouter()
 
-@router.post("/weather-probability", response_model=WeatherProbabilityResponse)
+@router.post(
+    "/weather-probability",
+    response_model=WeatherProbabilityResponse,
+    responses={200: {"content": {"application/msgpack": {}, "application/vnd.apache.arrow.stream": {}}}}
+)
 async def get_weather_probability(
     request: WeatherProbabilityRequest,
+    http_request: Request,
+    layout: str = Query("records", pattern="^(records|columns)$", description="Hourly probabilities as rows or columns (JSON only)"),
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Analyze weather probability for a given location and date range.
     Returns probability scores, summary text, and confidence level.
+    
+    Send ``Accept: application/msgpack`` for MessagePack or
+    ``Accept: application/vnd.apache.arrow.stream`` for an Arrow IPC table of
+    the hourly probabilities with the other fields in its schema metadata.
+    Both carry hourly probabilities as columns and the chart as raw PNG bytes.
     """
+    media_type = negotiate_format(http_request, tabular=True)
     try:
         weather_service = WeatherService()
         result = await weather_service.analyze_weather_probability(
@@ -35,9 +50,13 @@ async def get_weather_probability(
             start_date=request.start_date,
             end_date=request.end_date,
             conditions_checklist=request.conditions_checklist,
-            activity_profile=request.activity_profile
+            activity_profile=request.activity_profile,
+            include_chart=request.include_chart
         )
-        return result
+        if layout == "records" and media_type == JSON_TYPE:
+            result["hourly_probabilities"] = hourly_records(result["hourly_probabilities"])
+        # Built by the service from validated input; skip response re-validation
+        return negotiated_response(media_type, result, table="hourly_probabilities")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -46,13 +65,26 @@ async def get_weather_history(
     location: str,
     start_date: str,
     end_date: str,
+    request: Request,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get historical weather data for a location and date range.
-    Returns historical patterns and averages.
+    Returns historical patterns and averages, as MessagePack when requested.
     """
+    media_type = negotiate_format(request)
+    # Climatology is fixed by its inputs until the yearly window moves on
+    etag = make_etag(
+        "weather-history", location, start_date, end_date,
+        datetime.now().year, settings.HISTORICAL_YEARS, settings.DAYS_RANGE, media_type
+    )
+    cache_control = climatology_cache_control()
+    if etag_matches(request, etag):
+        response = not_modified(etag, cache_control)
+        response.headers["Vary"] = "Accept"
+        return response
+    
     try:
         weather_service = WeatherService()
         result = await weather_service.get_historical_weather(
@@ -60,6 +92,8 @@ async def get_weather_history(
             start_date=start_date,
             end_date=end_date
         )
-        return result
+        response = negotiated_response(media_type, result)
+        set_cache_headers(response, etag, cache_control)
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,129 @@
+import zlib
+from typing import Optional
+
+from app.core.config import settings
+
+# Bodies that are already compressed gain nothing from another pass
+INCOMPRESSIBLE_PREFIXES = ("image/", "audio/", "video/", "application/zip", "application/gzip", "font/woff")
+
+
+# Resolved once; a failed import is not cached by Python and would rescan
+# sys.path on every request
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Brotli when the client accepts it and the package is installed, else gzip."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, quality = part.strip().partition(";q=")
+        try:
+            accepted[coding.strip().lower()] = float(quality) if quality else 1.0
+        except ValueError:
+            continue
+    if accepted.get("br", 0) > 0 and brotli is not None:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.flush
+            self._finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush, so streamed chunks reach the client promptly."""
+        return self._compress(data) + self._flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compress(data) + self._finish()
+
+
+class CompressionMiddleware:
+    """Brotli or gzip response compression chosen from Accept-Encoding.
+
+    Bodies below COMPRESSION_MINIMUM_SIZE, already encoded bodies and
+    compressed media types pass through untouched. Streaming responses are
+    compressed chunk by chunk. Levels come from GZIP_LEVEL and BROTLI_QUALITY;
+    brotli needs the optional ``brotli`` package.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                response_headers = dict(message.get("headers", []))
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                state["passthrough"] = (
+                    b"content-encoding" in response_headers
+                    or message["status"] in (204, 304)
+                    or content_type.startswith(INCOMPRESSIBLE_PREFIXES)
+                )
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            start = state.pop("start", None)
+            if start is not None:
+                if state["passthrough"] or (not more_body and len(body) < self.minimum_size):
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                state["compressor"] = _Compressor(encoding)
+                response_headers = [
+                    (name, value) for name, value in start.get("headers", [])
+                    if name.lower() != b"content-length"
+                ]
+                if more_body:
+                    body = state["compressor"].chunk(body)
+                else:
+                    body = state["compressor"].finish(body)
+                    response_headers.append((b"content-length", str(len(body)).encode()))
+                response_headers.append((b"content-encoding", encoding.encode()))
+                vary = [value for name, value in response_headers if name.lower() == b"vary"]
+                response_headers = [(name, value) for name, value in response_headers if name.lower() != b"vary"]
+                response_headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+                await send({**start, "headers": response_headers})
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            if state["passthrough"]:
+                await send(message)
+                return
+            compressor = state["compressor"]
+            body = compressor.chunk(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -15,13 +15,91 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    
+    # Revoked tokens and refresh token families are shared between workers
+    # over Redis when set, else through the shared cache, whose new
+    # revocations are polled every REVOCATION_SYNC_SECONDS
+    REVOCATION_REDIS_URL: str = ""
+    REVOCATION_SYNC_SECONDS: float = 2.0
+    REVOCATION_BLOOM_CAPACITY: int = 100000
     
     # CORS
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
     
+    # Response compression (brotli needs the optional brotli package)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    
+    # Import the chart stack at startup rather than on first use
+    PRELOAD_ANALYSIS: bool = False
+    
+    # Production server (serve.py)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WORKERS: int = 0
+    GRACEFUL_TIMEOUT: int = 30
+    PRELOAD_APP: bool = True
+    
+    # Cache shared by all worker processes on a host
+    SHARED_CACHE_ENABLED: bool = True
+    SHARED_CACHE_PATH: str = ""
+    SHARED_CACHE_TTL_SECONDS: int = 86400
+    # Expired rows are purged every N writes; each namespace keeps at most MAX_ENTRIES
+    SHARED_CACHE_PURGE_EVERY: int = 100
+    SHARED_CACHE_MAX_ENTRIES: int = 20000
+    
+    # Observability
+    METRICS_ENABLED: bool = True
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = ""
+    OTEL_SERVICE_NAME: str = "weather-analysis-api"
+    
     # App Settings
     HISTORICAL_YEARS: int = 5
     DAYS_RANGE: int = 2
+    # Interval method for probabilities: "wilson" or "bootstrap" (resamples days)
+    CONFIDENCE_INTERVAL_METHOD: str = "wilson"
+    CONFIDENCE_LEVEL: float = 0.95
+    BOOTSTRAP_RESAMPLES: int = 2000
+    # Windows longer than this many days are aggregated while fetching; 0 disables
+    STREAMING_WINDOW_DAYS: int = 365
+    GRID_RESOLUTION_DEG: float = 0.25
+    # Fetch history per grid node and interpolate bilinearly between nodes
+    GRIDDED_ANALYSIS: bool = False
+    # Down-weight nodes by elevation difference (metres); 0 disables
+    GRID_ELEVATION_SCALE_M: float = 0.0
+    BULK_TRIPS_MAX: int = 1000
+    BULK_IMPORT_MAX_BYTES: int = 2 * 1024 * 1024
+    CLIMATOLOGY_CACHE_MAX_AGE: int = 86400
+    CALENDAR_FEED_MAX_AGE: int = 300
+    CALENDAR_TOKEN_EXPIRE_DAYS: int = 365
+    
+    # Blend community report frequencies into historical probabilities
+    COMMUNITY_BLEND_WEIGHT: float = 0.2
+    COMMUNITY_MIN_REPORTS: int = 5
+    COMMUNITY_CACHE_SECONDS: int = 60
+    
+    # Reports older than REPORTS_HOT_DAYS move to monthly Parquet files
+    REPORTS_HOT_DAYS: int = 365
+    REPORTS_ARCHIVE_DIR: str = "./archive/reports"
+    REPORTS_ARCHIVE_INTERVAL_HOURS: int = 0
+    
+    # Live dashboard WebSocket: topics re-check for changes every LIVE_REFRESH_SECONDS
+    LIVE_REFRESH_SECONDS: float = 30.0
+    LIVE_QUEUE_SIZE: int = 32
+    LIVE_SEND_TIMEOUT_SECONDS: float = 10.0
+    LIVE_MAX_TOPICS: int = 10
+    LIVE_REPORTS_LIMIT: int = 50
+    LIVE_TICKET_SECONDS: int = 30
+    
+    # Trip weather watcher
+    TRIP_WATCH_ENABLED: bool = False
+    TRIP_WATCH_INTERVAL_MINUTES: int = 1440
+    TRIP_WATCH_HORIZON_DAYS: int = 60
+    TRIP_WATCH_BATCH_SIZE: int = 200
+    TRIP_WATCH_CHANGE_THRESHOLD: float = 5.0
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,37 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+# User data changes at any time: clients may keep a copy but must revalidate
+REVALIDATE = "private, no-cache"
+
+def climatology_cache_control() -> str:
+    """Historical climatology only changes when the yearly window rolls over."""
+    return f"private, max-age={settings.CLIMATOLOGY_CACHE_MAX_AGE}"
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from the values that determine a response body."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of ``etag`` against the request's If-None-Match."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = REVALIDATE):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+def not_modified(etag: str, cache_control: str = REVALIDATE) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, cache_control)
+    return response
@@ -0,0 +1,180 @@
+import logging
+import os
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Optional, Tuple
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+from prometheus_client.core import CounterMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"]
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+)
+STAGE_LATENCY = Histogram(
+    "analysis_stage_duration_seconds",
+    "Time spent in each stage of a weather analysis",
+    ["stage"]
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to upstream weather providers",
+    ["provider"]
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_errors_total",
+    "Failed calls to upstream weather providers",
+    ["provider"]
+)
+
+# Mutable per-request query counter; a list so copies of the context share it
+_db_queries: ContextVar[Optional[list]] = ContextVar("db_queries", default=None)
+_tracer = None
+_cache_stats: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+
+class _CacheCollector:
+    """Exposes hit/miss totals of registered caches at scrape time."""
+
+    def collect(self):
+        family = CounterMetricFamily("cache_requests", "Cache lookups by result", labels=["cache", "result"])
+        for name, stats in _cache_stats.items():
+            hits, misses = stats()
+            family.add_metric([name, "hit"], hits)
+            family.add_metric([name, "miss"], misses)
+        yield family
+
+
+REGISTRY.register(_CacheCollector())
+
+
+def register_cache(name: str, stats: Callable[[], Tuple[int, int]]):
+    """Report a cache's ``(hits, misses)`` totals under ``cache_requests_total``."""
+    _cache_stats[name] = stats
+
+
+def instrument_engine(engine: Engine):
+    """Count executed statements against the current request."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        counter = _db_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+def span(name: str):
+    """An OpenTelemetry span when tracing is configured, else a no-op."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name)
+
+
+@contextmanager
+def stage(name: str):
+    """Time one stage of the analysis pipeline."""
+    start = perf_counter()
+    with span(f"analysis.{name}"):
+        try:
+            yield
+        finally:
+            STAGE_LATENCY.labels(name).observe(perf_counter() - start)
+
+
+@contextmanager
+def upstream(provider: str):
+    """Time one upstream provider call and count its failures."""
+    start = perf_counter()
+    with span(f"upstream.{provider}"):
+        try:
+            yield
+        except Exception:
+            UPSTREAM_ERRORS.labels(provider).inc()
+            raise
+        finally:
+            UPSTREAM_LATENCY.labels(provider).observe(perf_counter() - start)
+
+
+def setup_tracing():
+    """Export traces over OTLP/HTTP when OTEL_EXPORTER_OTLP_ENDPOINT is set.
+
+    The OpenTelemetry SDK and exporter are optional dependencies.
+    """
+    global _tracer
+    if not settings.OTEL_EXPORTER_OTLP_ENDPOINT or _tracer is not None:
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        logger.warning(
+            "OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk and "
+            "opentelemetry-exporter-otlp-proto-http are not installed; tracing disabled"
+        )
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT)))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer(settings.OTEL_SERVICE_NAME)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    # Several workers (serve.py): merge the per-process metric files. Cache
+    # totals are kept in process memory, so those cover the answering worker.
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_CacheCollector())
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Records latency, DB statement count and a trace span per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        counter = [0]
+        token = _db_queries.set(counter)
+        start = perf_counter()
+        try:
+            with span(f"{scope['method']} {scope['path']}"):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            _db_queries.reset(token)
+            # Label by route template so path parameters don't explode cardinality
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route_path, status["code"]).observe(perf_counter() - start)
+            REQUEST_DB_QUERIES.labels(scope["method"], route_path).observe(counter[0])
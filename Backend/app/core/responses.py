@@ -0,0 +1,119 @@
+import base64
+import importlib.util
+from typing import Any, Dict, Optional
+
+import numpy as np
+import orjson
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPE = "application/msgpack"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+# Media types clients use for MessagePack besides the registered one
+MSGPACK_ALIASES = ("application/x-msgpack", "application/vnd.msgpack")
+
+def _numpy_default(value: Any) -> Any:
+    # orjson serializes numeric arrays natively and defers anything else,
+    # such as object arrays, to this hook
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+class NumpyJSONResponse(ORJSONResponse):
+    """ORJSONResponse that serializes NumPy arrays and scalars natively.
+
+    Routes return it directly for trusted internal data, which skips FastAPI's
+    jsonable_encoder pass and response-model re-validation.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_numpy_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+class MsgPackResponse(Response):
+    """MessagePack body; needs the optional ``msgpack`` package."""
+
+    media_type = MSGPACK_TYPE
+
+    def render(self, content: Any) -> bytes:
+        import msgpack
+        return msgpack.packb(content, default=_numpy_default, use_bin_type=True)
+
+class ArrowResponse(Response):
+    """Arrow IPC stream of one column table; needs the optional ``pyarrow``.
+
+    ``content`` is ``(columns, metadata, attachments)``: the columns become
+    one record batch, the metadata dict is stored as JSON in the schema
+    metadata under ``content`` and each attachment as raw bytes under its name.
+    """
+
+    media_type = ARROW_TYPE
+
+    def render(self, content: Any) -> bytes:
+        import pyarrow as pa
+        columns, metadata, attachments = content
+        table = pa.table({name: np.asarray(values) for name, values in columns.items()})
+        table = table.replace_schema_metadata({
+            "content": orjson.dumps(metadata, default=_numpy_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+            **attachments
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+# Checked once without importing: pyarrow is slow to import and only loaded
+# on first use, while a failed import would be retried on every request
+_AVAILABLE = {module: importlib.util.find_spec(module) is not None for module in ("msgpack", "pyarrow")}
+
+def negotiate_format(request: Request, tabular: bool = False) -> str:
+    """Pick JSON, MessagePack or Arrow (``tabular`` responses only) from Accept.
+    
+    Formats whose optional package is not installed are skipped, and JSON is
+    the fallback.
+    """
+    accepted = []
+    for index, part in enumerate(request.headers.get("accept", "").split(",")):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            accepted.append((-quality, index, media_type.lower()))
+    
+    for _, _, media_type in sorted(accepted):
+        if media_type in (MSGPACK_TYPE, *MSGPACK_ALIASES) and _AVAILABLE["msgpack"]:
+            return MSGPACK_TYPE
+        if media_type == ARROW_TYPE and tabular and _AVAILABLE["pyarrow"]:
+            return ARROW_TYPE
+        if media_type in (JSON_TYPE, "application/*", "*/*"):
+            return JSON_TYPE
+    return JSON_TYPE
+
+def negotiated_response(media_type: str, content: Dict, table: Optional[str] = None) -> Response:
+    """Render ``content`` in a format chosen by ``negotiate_format``.
+    
+    Binary formats carry the chart as raw PNG bytes under ``chart_png``
+    rather than base64 text. For Arrow, ``content[table]`` holds the columns
+    and the remaining fields go to the schema metadata.
+    """
+    if media_type == JSON_TYPE:
+        response = NumpyJSONResponse(content)
+    else:
+        content = dict(content)
+        chart = content.pop("chart_base64", None)
+        chart_png = base64.b64decode(chart) if chart else None
+        if media_type == MSGPACK_TYPE:
+            content["chart_png"] = chart_png
+            response = MsgPackResponse(content)
+        else:
+            columns = content.pop(table)
+            response = ArrowResponse((columns, content, {"chart_png": chart_png} if chart_png else {}))
+    response.headers["Vary"] = "Accept"
+    return response
@@ -0,0 +1,308 @@
+"""Revoked token ids (``jti``), checked in memory on every request.
+
+Each process holds a Bloom filter in front of an exact set of revoked ids
+with their expiry. Almost every token is not revoked and is rejected by the
+filter after a few bit tests; ids that pass it are confirmed against the
+exact set. Entries expire with the token they revoke, after which the token
+would be rejected anyway.
+
+Revocations reach other workers through a backend: Redis (or any server
+speaking its protocol) when REVOCATION_REDIS_URL is set, pushed over
+pub/sub, otherwise the host's shared cache, polled every
+REVOCATION_SYNC_SECONDS for entries written since the last poll. With
+neither available revocations stay in the process, which is only correct
+for a single worker.
+
+Refresh tokens are not denylisted when they are used. Each login starts a
+token family whose current generation the backend stores; a refresh
+advances it, so older tokens of the family stop working, and presenting
+one of them revokes the whole family.
+"""
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+# (jti, expiry as a UNIX timestamp)
+Revocation = Tuple[str, float]
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def _ttl(expires_at: float) -> int:
+    return max(1, math.ceil(expires_at - time.time()))
+
+
+class LocalBackend:
+    """Revocations and token families kept in this process only."""
+
+    polling = False
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, jti: str, expires_at: float):
+        pass
+
+    def load(self) -> Iterable[Revocation]:
+        return []
+
+    def subscribe(self, callback: Callable[[str, float], None]):
+        pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        value, expires_at = self._values.get(key, (None, 0.0))
+        return value if expires_at > time.time() else None
+
+    def compare_and_set(self, key: str, expected: Optional[bytes], value: bytes, expires_at: float) -> bool:
+        with self._lock:
+            if self.get(key) != expected:
+                return False
+            self._values[key] = (value, expires_at)
+            return True
+
+
+class SharedCacheBackend:
+    """Revocations in the host-wide shared cache; workers poll for them."""
+
+    polling = True
+    # Writers stamp entries before they commit, so each poll looks back a
+    # little to catch writes that committed after the previous poll
+    overlap = 5.0
+
+    def __init__(self):
+        # Never evict a revocation before the token it revokes expires
+        self.cache = SharedCache("revoked_tokens", max_entries=0)
+        self.families = SharedCache("refresh_families", max_entries=0)
+        self.since = 0.0
+
+    def publish(self, jti: str, expires_at: float):
+        self.cache.set(jti, repr(expires_at).encode(), ttl=_ttl(expires_at))
+
+    def load(self) -> Iterable[Revocation]:
+        rows = self.cache.items_since(self.since - self.overlap if self.since else 0)
+        if rows:
+            self.since = max(self.since, max(created_at for _, _, created_at in rows))
+        return [(jti, float(value)) for jti, value, _ in rows]
+
+    def subscribe(self, callback: Callable[[str, float], None]):
+        pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.families.get(key)
+
+    def compare_and_set(self, key: str, expected: Optional[bytes], value: bytes, expires_at: float) -> bool:
+        return self.families.compare_and_set(key, expected, value, ttl=_ttl(expires_at))
+
+
+class RedisBackend:
+    """Revocations as expiring Redis keys, announced on a pub/sub channel."""
+
+    polling = False
+    prefix = "weather-api:revoked:"
+    channel = "weather-api:revocations"
+
+    family_prefix = "weather-api:refresh-family:"
+
+    def __init__(self, url: str):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.watch_error = redis.WatchError
+        self._thread = None
+
+    def publish(self, jti: str, expires_at: float):
+        pipeline = self.client.pipeline()
+        pipeline.set(self.prefix + jti, repr(expires_at), ex=_ttl(expires_at))
+        pipeline.publish(self.channel, f"{jti} {expires_at!r}")
+        pipeline.execute()
+
+    def load(self) -> Iterable[Revocation]:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            value = self.client.get(key)
+            if value is not None:
+                yield key.decode()[len(self.prefix):], float(value)
+
+    def subscribe(self, callback: Callable[[str, float], None]):
+        def handle(message):
+            jti, _, expires_at = message["data"].decode().partition(" ")
+            callback(jti, float(expires_at))
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: handle})
+        self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.family_prefix + key)
+
+    def compare_and_set(self, key: str, expected: Optional[bytes], value: bytes, expires_at: float) -> bool:
+        key = self.family_prefix + key
+        with self.client.pipeline() as pipeline:
+            try:
+                pipeline.watch(key)
+                if pipeline.get(key) != expected:
+                    pipeline.unwatch()
+                    return False
+                pipeline.multi()
+                pipeline.set(key, value, ex=_ttl(expires_at))
+                pipeline.execute()
+                return True
+            except self.watch_error:
+                return False
+
+
+def create_backend():
+    if settings.REVOCATION_REDIS_URL:
+        try:
+            return RedisBackend(settings.REVOCATION_REDIS_URL)
+        except ImportError:
+            logger.warning("REVOCATION_REDIS_URL is set but the redis package is not installed; using the shared cache")
+    if not settings.SHARED_CACHE_ENABLED:
+        logger.warning(
+            "SHARED_CACHE_ENABLED is false and REVOCATION_REDIS_URL is not set; "
+            "token revocations are not shared between worker processes"
+        )
+        return LocalBackend()
+    return SharedCacheBackend()
+
+
+REVOKED_FAMILY = b"revoked"
+
+
+class RefreshFamilies:
+    """Current generation of each refresh token family, shared by all workers."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def start(self, family: str, expires_at: float) -> bool:
+        return self.backend.compare_and_set(family, None, b"0", expires_at)
+
+    def advance(self, family: str, generation: int, expires_at: float) -> bool:
+        """Move ``family`` past ``generation``; False if that is not current.
+
+        A token older than the current generation was already used, which
+        means it leaked, so the whole family is revoked.
+        """
+        if self.backend.compare_and_set(family, str(generation).encode(), str(generation + 1).encode(), expires_at):
+            return True
+        current = self.backend.get(family)
+        if current is not None and current != REVOKED_FAMILY:
+            logger.warning("Refresh token reuse in family %s; revoking it", family)
+            self.revoke(family, expires_at)
+        return False
+
+    def revoke(self, family: str, expires_at: float):
+        while True:
+            current = self.backend.get(family)
+            if current is None or current == REVOKED_FAMILY:
+                return
+            if self.backend.compare_and_set(family, current, REVOKED_FAMILY, expires_at):
+                return
+
+
+class Denylist:
+    def __init__(self, backend=None, capacity: Optional[int] = None, purge_interval: float = 60):
+        self.backend = backend
+        self.capacity = capacity or settings.REVOCATION_BLOOM_CAPACITY
+        self.purge_interval = purge_interval
+        self._bloom = BloomFilter(self.capacity)
+        self._expiry: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_purge = time.monotonic() + purge_interval
+        self._started_pid = None
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti or jti not in self._bloom:
+            return False
+        expires_at = self._expiry.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke(self, jti: str, expires_at: float):
+        """Revoke ``jti`` until ``expires_at`` here and on every other worker."""
+        self.add(jti, expires_at)
+        if self.backend is not None:
+            try:
+                self.backend.publish(jti, expires_at)
+            except Exception:
+                logger.exception("Could not publish revocation of %s", jti)
+
+    def add(self, jti: str, expires_at: float):
+        """Record a revocation locally, e.g. one received from another worker."""
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            if jti not in self._expiry:
+                self._bloom.add(jti)
+            self._expiry[jti] = expires_at
+        if time.monotonic() >= self._next_purge:
+            self.purge()
+
+    def purge(self):
+        """Drop expired entries and rebuild the filter without them."""
+        now = time.time()
+        with self._lock:
+            self._next_purge = time.monotonic() + self.purge_interval
+            live = {jti: expires_at for jti, expires_at in self._expiry.items() if expires_at > now}
+            if len(live) == len(self._expiry):
+                return
+            bloom = BloomFilter(max(self.capacity, 2 * len(live)))
+            for jti in live:
+                bloom.add(jti)
+            self._expiry, self._bloom = live, bloom
+
+    def sync(self):
+        for jti, expires_at in self.backend.load():
+            self.add(jti, expires_at)
+
+    def start(self):
+        """Load existing revocations and follow new ones; once per process."""
+        if self.backend is None or self._started_pid == os.getpid():
+            return
+        self._started_pid = os.getpid()
+        try:
+            self.sync()
+            self.backend.subscribe(self.add)
+        except Exception:
+            logger.exception("Could not load revoked tokens")
+        if self.backend.polling:
+            threading.Thread(target=self._poll, name="denylist-sync", daemon=True).start()
+
+    def _poll(self):
+        while True:
+            time.sleep(settings.REVOCATION_SYNC_SECONDS)
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Could not sync revoked tokens")
+            if time.monotonic() >= self._next_purge:
+                self.purge()
+
+
+denylist = Denylist(create_backend())
+refresh_families = RefreshFamilies(denylist.backend)
@@ -1,5 +1,7 @@
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -7,6 +9,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.revocation import denylist, refresh_families
 from app.db.database import get_db
 from app.db import models
 
@@ -25,10 +28,109 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti identifies the token so that it can be revoked before it expires
+    to_encode.setdefault("type", "access")
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(user_id: int, family: str, generation: int) -> str:
+    """Long-lived token that can only be exchanged for new tokens at /auth/refresh.
+    
+    ``family`` identifies the login it descends from and ``generation`` its
+    place in the chain; only the latest generation of a family is accepted.
+    """
+    return create_access_token(
+        {"sub": str(user_id), "type": "refresh", "fam": family, "gen": generation},
+        expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+def refresh_family_expiry() -> float:
+    """A family is kept as long as the refresh token issued last."""
+    return time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+def start_refresh_family() -> str:
+    family = uuid.uuid4().hex
+    refresh_families.start(family, refresh_family_expiry())
+    return family
+
+def rotate_refresh_token(payload: Dict) -> bool:
+    """Consume a decoded refresh token; False if it is not the latest of its family."""
+    family, generation = payload.get("fam"), payload.get("gen")
+    if not family or not isinstance(generation, int):
+        return False
+    return refresh_families.advance(family, generation, refresh_family_expiry())
+
+def revoke_refresh_family(payload: Dict):
+    if payload.get("fam"):
+        refresh_families.revoke(payload["fam"], refresh_family_expiry())
+
+def decode_token(token: str, token_type: str = "access") -> Optional[Dict]:
+    """Payload of a valid, unrevoked token of ``token_type``, else None."""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    # Tokens issued before token types existed are access tokens
+    if payload.get("type", "access") != token_type or "scope" in payload or payload.get("sub") is None:
+        return None
+    if denylist.is_revoked(payload.get("jti")):
+        return None
+    return payload
+
+def revoke_token(payload: Dict):
+    """Revoke a decoded token for the rest of its lifetime."""
+    if payload.get("jti") and payload.get("exp"):
+        denylist.revoke(payload["jti"], float(payload["exp"]))
+
+def create_live_ticket(access_payload: Dict) -> str:
+    """Short-lived, single-use ticket for opening the live dashboard socket.
+    
+    Carries the jti and expiry of the access token it was issued for, so the
+    socket can be closed when that token expires or is revoked.
+    """
+    return create_access_token(
+        {
+            "sub": access_payload["sub"],
+            "type": "live_ticket",
+            "session_jti": access_payload.get("jti"),
+            "session_exp": access_payload.get("exp")
+        },
+        expires_delta=timedelta(seconds=settings.LIVE_TICKET_SECONDS)
+    )
+
+def session_active(ticket_payload: Dict) -> bool:
+    """Whether the access token a live ticket was issued for is still valid."""
+    expires_at = ticket_payload.get("session_exp")
+    if expires_at is not None and expires_at <= time.time():
+        return False
+    return not denylist.is_revoked(ticket_payload.get("session_jti"))
+
+def create_calendar_token(user_id: int) -> str:
+    """Long-lived token that only grants read access to a calendar feed.
+    
+    It carries a jti so that a leaked feed URL can be revoked.
+    """
+    expire = datetime.utcnow() + timedelta(days=settings.CALENDAR_TOKEN_EXPIRE_DAYS)
+    return jwt.encode(
+        {"sub": str(user_id), "scope": "calendar", "exp": expire, "jti": uuid.uuid4().hex},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM
+    )
+
+def decode_calendar_token(token: str) -> Optional[Dict]:
+    """Payload of a valid, unrevoked calendar token, else None."""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    # Tokens without a jti predate revocation and cannot be revoked; reject them
+    if payload.get("scope") != "calendar" or payload.get("sub") is None or not payload.get("jti"):
+        return None
+    if denylist.is_revoked(payload["jti"]):
+        return None
+    return payload
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -38,15 +140,12 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    # Rejects scoped tokens such as calendar feed tokens
+    payload = decode_token(token)
+    if payload is None:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+    user = db.query(models.User).filter(models.User.id == int(payload["sub"])).first()
     if user is None:
         raise credentials_exception
     return user
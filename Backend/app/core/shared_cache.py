@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.observability import register_cache
+
+
+def default_cache_path() -> str:
+    """Prefer tmpfs so the cache lives in shared memory on Linux hosts."""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "weather-api-cache.sqlite3")
+
+
+class SharedCache:
+    """A bytes cache shared by every worker process on the host.
+
+    Entries live in one SQLite database in WAL mode (on tmpfs by default), so
+    N workers hold a single copy instead of N private ones. Each process and
+    thread opens its own connection lazily, which keeps it safe across fork.
+
+    Since tmpfs is memory, every ``SHARED_CACHE_PURGE_EVERY`` writes delete
+    expired rows and trim the namespace to ``max_entries``, evicting the
+    entries closest to expiry. ``max_entries=0`` disables the cap for
+    namespaces whose entries must not be dropped early.
+    """
+
+    def __init__(self, namespace: str, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.namespace = namespace
+        self.path = path or settings.SHARED_CACHE_PATH or default_cache_path()
+        self.max_entries = settings.SHARED_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = threading.local()
+        register_cache(namespace, lambda: (self.hits, self.misses))
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT, key TEXT, value BLOB, expires_at REAL, created_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expiry ON cache (namespace, expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (namespace, created_at)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not settings.SHARED_CACHE_ENABLED:
+            return None
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.namespace, key, time.time())
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def _put(self, conn: sqlite3.Connection, key: str, value: bytes, ttl: Optional[int]):
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, created_at) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, key, value, now + (ttl or settings.SHARED_CACHE_TTL_SECONDS), now)
+        )
+        self._writes += 1
+        if self._writes % settings.SHARED_CACHE_PURGE_EVERY == 0:
+            self.purge_expired()
+            self.trim()
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        if not settings.SHARED_CACHE_ENABLED:
+            return
+        self._put(self._connection(), key, value, ttl)
+
+    def compare_and_set(self, key: str, expected: Optional[bytes], value: bytes, ttl: Optional[int] = None) -> bool:
+        """Set ``key`` only if its live value is ``expected`` (None: absent)."""
+        if not settings.SHARED_CACHE_ENABLED:
+            return False
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front, so no other writer interleaves
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, time.time())
+            ).fetchone()
+            if (row[0] if row else None) != expected:
+                conn.execute("ROLLBACK")
+                return False
+            self._put(conn, key, value, ttl)
+            conn.execute("COMMIT")
+            return True
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def items_since(self, since: float = 0) -> List[Tuple[str, bytes, float]]:
+        """Live entries of this namespace written after ``since``, with their write time."""
+        if not settings.SHARED_CACHE_ENABLED:
+            return []
+        return self._connection().execute(
+            "SELECT key, value, created_at FROM cache WHERE namespace = ? AND created_at > ? AND expires_at > ?",
+            (self.namespace, since, time.time())
+        ).fetchall()
+
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def purge_expired(self) -> int:
+        """Delete expired entries of every namespace."""
+        cursor = self._connection().execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def trim(self) -> int:
+        """Evict the entries closest to expiry beyond ``max_entries``."""
+        if not self.max_entries:
+            return 0
+        conn = self._connection()
+        count, = conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)).fetchone()
+        if count <= self.max_entries:
+            return 0
+        cursor = conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            "SELECT key FROM cache WHERE namespace = ? ORDER BY expires_at LIMIT ?)",
+            (self.namespace, self.namespace, count - self.max_entries)
+        )
+        return cursor.rowcount
+
+
+climatology_cache = SharedCache("climatology")
+# Community report frequencies, kept briefly so new reports show up soon
+community_cache = SharedCache("community")
@@ -1,12 +1,17 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.core.config import settings
 
+# An in-memory SQLite database only exists per connection, so share one
+in_memory = settings.DATABASE_URL in ("sqlite://", "sqlite:///:memory:")
+
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+    **({"poolclass": StaticPool} if in_memory else {})
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Text, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -45,6 +45,20 @@ class Trip(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     user = relationship("User", back_populates="trips")
+    forecast = relationship("TripForecast", back_populates="trip", uselist=False, cascade="all, delete-orphan")
+
+class TripForecast(Base):
+    __tablename__ = "trip_forecasts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    trip_id = Column(Integer, ForeignKey("trips.id"), unique=True, nullable=False)
+    cell_latitude = Column(Float)
+    cell_longitude = Column(Float)
+    probabilities = Column(JSON, default={})
+    checked_at = Column(DateTime, default=datetime.utcnow)
+    changed_at = Column(DateTime, default=datetime.utcnow)
+    
+    trip = relationship("Trip", back_populates="forecast")
 
 class Report(Base):
     __tablename__ = "reports"
@@ -54,7 +68,7 @@ class Report(Base):
     location = Column(String, nullable=False)
     latitude = Column(Float)
     longitude = Column(Float)
-    report_date = Column(DateTime, nullable=False)
+    report_date = Column(DateTime, nullable=False, index=True)
     weather_conditions = Column(JSON)
     description = Column(Text)
     photos = Column(JSON, default=[])
@@ -62,3 +76,15 @@ class Report(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     user = relationship("User", back_populates="reports")
+
+class ReportRollup(Base):
+    __tablename__ = "report_rollups"
+    __table_args__ = (UniqueConstraint("cell_latitude", "cell_longitude", "day", "condition"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cell_latitude = Column(Float, nullable=False)
+    cell_longitude = Column(Float, nullable=False)
+    day = Column(Date, nullable=False)
+    condition = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,7 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, constr, field_validator
 from typing import List, Optional, Dict
 from datetime import datetime
 
+from app.services.conditions import MAX_CONDITION_LENGTH, validate_conditions
+
+ConditionExpression = constr(max_length=MAX_CONDITION_LENGTH)
+
 class TripBase(BaseModel):
     name: str
     location: str
@@ -13,7 +17,9 @@ class TripBase(BaseModel):
     conditions_checklist: List[str] = []
 
 class TripCreate(TripBase):
-    pass
+    conditions_checklist: List[ConditionExpression] = []
+    
+    _validate_conditions = field_validator("conditions_checklist")(validate_conditions)
 
 class TripUpdate(BaseModel):
     name: Optional[str] = None
@@ -23,7 +29,16 @@ class TripUpdate(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     activity_type: Optional[str] = None
-    conditions_checklist: Optional[List[str]] = None
+    conditions_checklist: Optional[List[ConditionExpression]] = None
+    
+    _validate_conditions = field_validator("conditions_checklist")(validate_conditions)
+
+class TripBulkUpdate(TripUpdate):
+    id: int
+
+class BulkTripResponse(BaseModel):
+    ids: List[int]
+    count: int
 
 class TripResponse(TripBase):
     id: int
@@ -1,13 +1,22 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, constr, field_validator
+from typing import Any, List, Optional, Dict, Union
 from datetime import datetime
 
+from app.services.conditions import MAX_CONDITION_LENGTH, validate_conditions
+
 class WeatherProbabilityRequest(BaseModel):
     location: str = Field(..., description="Location name or coordinates")
     start_date: str = Field(..., description="Start date in YYYY-MM-DD format")
     end_date: Optional[str] = Field(None, description="End date in YYYY-MM-DD format")
-    conditions_checklist: List[str] = Field(default=[], description="Weather conditions to check")
+    conditions_checklist: List[constr(max_length=MAX_CONDITION_LENGTH)] = Field(
+        default=[],
+        description="Weather conditions to check, e.g. 'temp between 18 and 28 and wind < 8'"
+    )
     activity_profile: Optional[str] = Field(None, description="Activity type for recommendations")
+    
+    include_chart: bool = Field(True, description="Render the probability chart as base64 PNG")
+    
+    _validate_conditions = field_validator("conditions_checklist")(validate_conditions)
 
 class HourlyProbability(BaseModel):
     hour: int
@@ -15,13 +24,39 @@ class HourlyProbability(BaseModel):
     cloudy_prob: float
     sunny_prob: float
     high_wind_prob: float
+    rain_prob_low: Optional[float] = None
+    rain_prob_high: Optional[float] = None
+    cloudy_prob_low: Optional[float] = None
+    cloudy_prob_high: Optional[float] = None
+    sunny_prob_low: Optional[float] = None
+    sunny_prob_high: Optional[float] = None
+    high_wind_prob_low: Optional[float] = None
+    high_wind_prob_high: Optional[float] = None
+
+class HourlyProbabilityColumns(BaseModel):
+    hour: List[int]
+    rain_prob: List[float]
+    cloudy_prob: List[float]
+    sunny_prob: List[float]
+    high_wind_prob: List[float]
+    rain_prob_low: Optional[List[float]] = None
+    rain_prob_high: Optional[List[float]] = None
+    cloudy_prob_low: Optional[List[float]] = None
+    cloudy_prob_high: Optional[List[float]] = None
+    sunny_prob_low: Optional[List[float]] = None
+    sunny_prob_high: Optional[List[float]] = None
+    high_wind_prob_low: Optional[List[float]] = None
+    high_wind_prob_high: Optional[List[float]] = None
 
 class WeatherProbabilityResponse(BaseModel):
     location: str
     coordinates: Dict[str, float]
     date: str
     summary: Dict[str, float]
-    hourly_probabilities: List[HourlyProbability]
+    hourly_probabilities: Union[List[HourlyProbability], HourlyProbabilityColumns]
+    condition_probabilities: Dict[str, float] = {}
+    checklist_probability: Optional[float] = None
+    community_reports: int = 0
     confidence_level: str
     summary_text: str
     chart_base64: Optional[str] = None
@@ -34,5 +69,5 @@ class WeatherHistoryRequest(BaseModel):
 class WeatherHistoryResponse(BaseModel):
     location: str
     date_range: Dict[str, str]
-    historical_patterns: Dict[str, any]
+    historical_patterns: Dict[str, Any]
     averages: Dict[str, float]
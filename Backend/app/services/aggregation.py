@@ -0,0 +1,156 @@
+"""Per-day counters behind the probability statistics.
+
+The batch path derives them from a complete ``HistoricalFrame``.
+``HourlyAccumulator`` folds one fetched slice at a time into the same
+counters, so long historical windows never hold their raw rows.
+"""
+import io
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.conditions import compile_condition
+from app.services.historical_frame import HistoricalFrame, HOURS_PER_DAY
+
+# Per-unit numerators and denominators, both of shape (units, estimates)
+Counts = Tuple[np.ndarray, np.ndarray]
+
+
+def daily_counts(frame: HistoricalFrame, conditions: Dict[str, str]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Observations per (day, hour) and, per named condition, how many matched.
+
+    Arrays have shape (days, 24); days are the frame's fetched slices.
+    """
+    cells = frame.slice_ids.astype(np.int64) * HOURS_PER_DAY + frame.hours
+    size = frame.slices * HOURS_PER_DAY
+    counts = np.bincount(cells, minlength=size).reshape(-1, HOURS_PER_DAY)
+    hits = {
+        name: np.bincount(cells, weights=compile_condition(condition)(frame), minlength=size).reshape(-1, HOURS_PER_DAY)
+        for name, condition in conditions.items()
+    }
+    return counts, hits
+
+
+def hourly_statistics(counts: np.ndarray, hits: Dict[str, np.ndarray]) -> Counts:
+    """Per-day counts for every (condition, hour), 24 columns per condition."""
+    numerators = np.concatenate(list(hits.values()), axis=1)
+    denominators = np.tile(counts, len(hits))
+    return numerators, denominators
+
+
+def summary_statistics(counts: np.ndarray, hits: Dict[str, np.ndarray]) -> Counts:
+    """Per-day counts for the matching share of hours and of days, per condition."""
+    hours_per_day = counts.sum(axis=1)
+    numerators, denominators = [], []
+    for daily_hits in hits.values():
+        matched = daily_hits.sum(axis=1)
+        numerators += [matched, matched > 0]
+        denominators += [hours_per_day, hours_per_day > 0]
+    return np.column_stack(numerators).astype(float), np.column_stack(denominators).astype(float)
+
+
+class HourlyAccumulator:
+    """Running counters for a fixed set of conditions, fed slice by slice.
+
+    With ``keep_days`` off the counters are totals, so memory is
+    O(hours x conditions) whatever the window. Bootstrap intervals resample
+    days and need ``keep_days``, which keeps one row of counters per day
+    but still never the observations. Results match the batch path on the
+    same data. A variable a provider leaves out of some slices only is the
+    exception: batch evaluation sees NaN for those rows, while streaming
+    treats the variable as absent in those slices.
+    """
+
+    def __init__(self, conditions: Dict[str, str], expressions: Sequence[str] = (), keep_days: bool = False):
+        self.conditions = dict(conditions)
+        self.expressions = list(expressions)
+        self.keep_days = keep_days
+        self.days = 0
+        self.observations = 0
+        self.expression_hits = np.zeros(len(self.expressions), dtype=np.int64)
+        self.checklist_hits = 0
+        self._hourly: List[Counts] = []
+        self._summary: List[Counts] = []
+
+    def add(self, frame: HistoricalFrame):
+        """Fold every row of ``frame`` into the counters."""
+        if frame.empty:
+            return
+        counts, hits = daily_counts(frame, self.conditions)
+        self._fold(self._hourly, hourly_statistics(counts, hits))
+        self._fold(self._summary, summary_statistics(counts, hits))
+        self.days += frame.slices
+        self.observations += len(frame)
+
+        if self.expressions:
+            masks = [compile_condition(expression)(frame) for expression in self.expressions]
+            self.expression_hits += [int(mask.sum()) for mask in masks]
+            self.checklist_hits += int(np.logical_and.reduce(masks).sum())
+
+    def _fold(self, store: List[Counts], counts: Counts):
+        numerators, denominators = counts
+        if self.keep_days:
+            store.append((numerators, denominators))
+        elif store:
+            store[0][0][0] += numerators.sum(axis=0)
+            store[0][1][0] += denominators.sum(axis=0)
+        else:
+            store.append((numerators.sum(axis=0, keepdims=True), denominators.sum(axis=0, keepdims=True)))
+
+    @staticmethod
+    def _stack(store: List[Counts]) -> Counts:
+        return np.concatenate([n for n, _ in store]), np.concatenate([d for _, d in store])
+
+    @property
+    def empty(self) -> bool:
+        return self.observations == 0
+
+    def hourly_statistics(self) -> Counts:
+        return self._stack(self._hourly)
+
+    def summary_statistics(self) -> Counts:
+        return self._stack(self._summary)
+
+    def condition_probabilities(self) -> Dict[str, float]:
+        if self.empty:
+            return {expression: 0.0 for expression in self.expressions}
+        return {
+            expression: float(hits / self.observations * 100)
+            for expression, hits in zip(self.expressions, self.expression_hits)
+        }
+
+    def checklist_probability(self) -> Optional[float]:
+        if not self.expressions or self.empty:
+            return None
+        return float(self.checklist_hits / self.observations * 100)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the counters, e.g. for the shared climatology cache."""
+        buffer = io.BytesIO()
+        hourly, summary = (self.hourly_statistics(), self.summary_statistics()) if not self.empty else ((), ())
+        np.savez(
+            buffer,
+            conditions=np.array(list(self.conditions.items())),
+            expressions=np.array(self.expressions, dtype=str),
+            keep_days=np.array(self.keep_days),
+            totals=np.array([self.days, self.observations, self.checklist_hits]),
+            expression_hits=self.expression_hits,
+            **({"hourly_numerators": hourly[0], "hourly_denominators": hourly[1],
+                "summary_numerators": summary[0], "summary_denominators": summary[1]} if hourly else {})
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HourlyAccumulator":
+        arrays = np.load(io.BytesIO(data))
+        accumulator = cls(
+            dict(arrays["conditions"].tolist()),
+            arrays["expressions"].tolist(),
+            bool(arrays["keep_days"])
+        )
+        accumulator.days, accumulator.observations, accumulator.checklist_hits = (int(v) for v in arrays["totals"])
+        accumulator.expression_hits = arrays["expression_hits"].astype(np.int64)
+        if "hourly_numerators" in arrays.files:
+            accumulator._hourly = [(arrays["hourly_numerators"], arrays["hourly_denominators"])]
+            accumulator._summary = [(arrays["summary_numerators"], arrays["summary_denominators"])]
+        return accumulator
@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import models
+from app.db.database import SessionLocal
+from app.core.shared_cache import SharedCache
+from app.services.ical import escape_text, fold_line, format_datetime
+
+# Rendered feeds keyed by ETag, so unconditional polls reuse the last body
+feed_cache = SharedCache("calendar_feeds")
+
+PROBABILITY_LABELS = {
+    "rain_prob": "Rain",
+    "cloudy_prob": "Cloudy",
+    "sunny_prob": "Sunny",
+    "high_wind_prob": "High wind",
+}
+
+
+def feed_state(db: Session, user_id: int) -> Tuple[int, Optional[datetime]]:
+    """Trip count and latest trip or forecast change, without loading rows."""
+    count, trips_updated, forecasts_changed = db.query(
+        func.count(models.Trip.id),
+        func.max(models.Trip.updated_at),
+        func.max(models.TripForecast.changed_at)
+    ).outerjoin(models.TripForecast, models.TripForecast.trip_id == models.Trip.id).filter(
+        models.Trip.user_id == user_id
+    ).one()
+    changes = [value for value in (trips_updated, forecasts_changed) if value is not None]
+    return count, max(changes) if changes else None
+
+
+def describe_forecast(probabilities: Dict) -> str:
+    parts = [
+        f"{label} {probabilities[key]:.0f}%"
+        for key, label in PROBABILITY_LABELS.items()
+        if probabilities.get(key) is not None
+    ]
+    lines = ["Historical weather odds: " + ", ".join(parts)] if parts else []
+    for expression, value in (probabilities.get("conditions") or {}).items():
+        lines.append(f"{expression}: {value:.0f}%")
+    if probabilities.get("checklist") is not None and len(probabilities.get("conditions") or {}) > 1:
+        lines.append(f"All conditions together: {probabilities['checklist']:.0f}%")
+    return "\n".join(lines)
+
+
+def render_event(trip: models.Trip, now: datetime) -> str:
+    forecast = trip.forecast
+    last_modified = max(trip.updated_at, forecast.changed_at) if forecast else trip.updated_at
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:trip-{trip.id}@weather-analysis-api",
+        f"DTSTAMP:{format_datetime(now)}Z",
+        f"LAST-MODIFIED:{format_datetime(last_modified)}Z",
+        f"DTSTART:{format_datetime(trip.start_date)}",
+        f"DTEND:{format_datetime(trip.end_date)}",
+        f"SUMMARY:{escape_text(trip.name)}",
+        f"LOCATION:{escape_text(trip.location)}",
+    ]
+    if trip.latitude is not None and trip.longitude is not None:
+        lines.append(f"GEO:{trip.latitude};{trip.longitude}")
+    if trip.activity_type:
+        lines.append(f"CATEGORIES:{escape_text(trip.activity_type)}")
+    if forecast and forecast.probabilities:
+        lines.append(f"DESCRIPTION:{escape_text(describe_forecast(forecast.probabilities))}")
+    lines.append("END:VEVENT")
+    return "".join(fold_line(line) for line in lines)
+
+
+def iter_feed(user_id: int, batch_size: int = 200) -> Iterator[str]:
+    """Stream the calendar one event at a time from its own session."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        yield (
+            "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"
+            "PRODID:-//Weather Analysis API//Trips//EN\r\n"
+            "X-WR-CALNAME:My trips\r\n"
+        )
+        trips = db.query(models.Trip).options(joinedload(models.Trip.forecast)).filter(
+            models.Trip.user_id == user_id
+        ).order_by(models.Trip.start_date).yield_per(batch_size)
+        for trip in trips:
+            yield render_event(trip, now)
+        yield "END:VCALENDAR\r\n"
+    finally:
+        db.close()
@@ -0,0 +1,212 @@
+import re
+import numpy as np
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from app.core.observability import register_cache
+from app.services.historical_frame import HistoricalFrame
+
+# Names users may write in conditions, mapped to provider variables
+VARIABLE_ALIASES = {
+    "temp": "t_2m:C",
+    "temperature": "t_2m:C",
+    "precip": "precip_1h:mm",
+    "precipitation": "precip_1h:mm",
+    "humidity": "relative_humidity_2m:p",
+    "wind": "wind_speed_10m:ms",
+    "wind_speed": "wind_speed_10m:ms",
+}
+
+# Named conditions, usable on their own or inside larger expressions
+BUILTIN_CONDITIONS = {
+    "rain": "precip > 0",
+    "cloudy": "humidity > 70",
+    "sunny": "precip == 0 and humidity < 60",
+    "high_wind": "wind > 10",
+}
+
+_COMPARISONS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "=": np.equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+# Bounds on user input, so parsing and evaluation cannot recurse too deeply
+MAX_CONDITION_LENGTH = 500
+MAX_NESTING_DEPTH = 32
+
+_TOKEN_RE = re.compile(r"\s*(?:(-?\d+(?:\.\d+)?)|(<=|>=|==|!=|<|>|=)|([a-z_]+)|(\(|\)))")
+
+Columns = Dict[str, np.ndarray]
+
+
+class ConditionSyntaxError(ValueError):
+    """Raised when a condition expression cannot be parsed."""
+
+
+class CompiledCondition:
+    """A parsed condition, evaluated as vectorized NumPy operations.
+
+    Evaluates to a boolean mask over the rows of a ``HistoricalFrame``. When
+    the frame lacks any variable the condition refers to, no row matches.
+    """
+
+    def __init__(self, expression: str, evaluate: Callable[[Columns], np.ndarray], variables: FrozenSet[str]):
+        self.expression = expression
+        self.variables = variables
+        self._evaluate = evaluate
+
+    def __call__(self, frame: HistoricalFrame) -> np.ndarray:
+        if not all(frame.has(name) for name in self.variables):
+            return np.zeros(len(frame), dtype=bool)
+        columns = {name: frame.column(name) for name in self.variables}
+        return self._evaluate(columns)
+
+    def probability(self, frame: HistoricalFrame) -> float:
+        """Share of rows matching the condition, as a percentage."""
+        if frame.empty:
+            return 0.0
+        return float(self(frame).mean() * 100)
+
+
+class _Parser:
+    def __init__(self, expression: str):
+        self.tokens = self._tokenize(expression)
+        self.pos = 0
+        self.depth = 0
+        self.variables = set()
+
+    @staticmethod
+    def _tokenize(expression: str) -> List[str]:
+        tokens = []
+        pos = 0
+        expression = expression.rstrip()
+        while pos < len(expression):
+            match = _TOKEN_RE.match(expression, pos)
+            if not match:
+                raise ConditionSyntaxError(f"Unexpected character at position {pos}: {expression[pos:]!r}")
+            tokens.append(next(group for group in match.groups() if group is not None))
+            pos = match.end()
+        return tokens
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected: str = None) -> str:
+        token = self.peek()
+        if token is None:
+            raise ConditionSyntaxError("Unexpected end of condition")
+        if expected is not None and token != expected:
+            raise ConditionSyntaxError(f"Expected {expected!r}, found {token!r}")
+        self.pos += 1
+        return token
+
+    def number(self) -> float:
+        token = self.take()
+        try:
+            return float(token)
+        except ValueError:
+            raise ConditionSyntaxError(f"Expected a number, found {token!r}")
+
+    def parse(self) -> Callable[[Columns], np.ndarray]:
+        if not self.tokens:
+            raise ConditionSyntaxError("Empty condition")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise ConditionSyntaxError(f"Unexpected {self.peek()!r}")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == "or":
+            self.take()
+            left, right = node, self.parse_and()
+            node = lambda columns, left=left, right=right: np.logical_or(left(columns), right(columns))
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() == "and":
+            self.take()
+            left, right = node, self.parse_not()
+            node = lambda columns, left=left, right=right: np.logical_and(left(columns), right(columns))
+        return node
+
+    def enter(self):
+        self.depth += 1
+        if self.depth > MAX_NESTING_DEPTH:
+            raise ConditionSyntaxError(f"Condition is nested more than {MAX_NESTING_DEPTH} levels deep")
+
+    def parse_not(self):
+        if self.peek() == "not":
+            self.take()
+            self.enter()
+            operand = self.parse_not()
+            self.depth -= 1
+            return lambda columns: np.logical_not(operand(columns))
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.take()
+        if token == "(":
+            self.enter()
+            node = self.parse_or()
+            self.take(")")
+            self.depth -= 1
+            return node
+        if token in BUILTIN_CONDITIONS:
+            compiled = compile_condition(BUILTIN_CONDITIONS[token])
+            self.variables.update(compiled.variables)
+            return compiled._evaluate
+        if token not in VARIABLE_ALIASES:
+            raise ConditionSyntaxError(f"Unknown variable or condition {token!r}")
+
+        variable = VARIABLE_ALIASES[token]
+        self.variables.add(variable)
+        operator = self.take()
+        if operator == "between":
+            low = self.number()
+            self.take("and")
+            high = self.number()
+            return lambda columns: (columns[variable] >= low) & (columns[variable] <= high)
+        if operator not in _COMPARISONS:
+            raise ConditionSyntaxError(f"Expected a comparison after {token!r}, found {operator!r}")
+        compare = _COMPARISONS[operator]
+        threshold = self.number()
+        return lambda columns: compare(columns[variable], threshold)
+
+
+def normalize_condition(expression: str) -> str:
+    return " ".join(expression.lower().split())
+
+
+@lru_cache(maxsize=512)
+def _compile(expression: str) -> CompiledCondition:
+    parser = _Parser(expression)
+    evaluate = parser.parse()
+    return CompiledCondition(expression, evaluate, frozenset(parser.variables))
+
+
+def compile_condition(expression: str) -> CompiledCondition:
+    """Parse a condition such as ``"temp between 18 and 28 and wind < 8"``.
+
+    Compiled conditions are cached by their normalized expression string.
+    """
+    expression = normalize_condition(expression)
+    if len(expression) > MAX_CONDITION_LENGTH:
+        raise ConditionSyntaxError(f"Condition is longer than {MAX_CONDITION_LENGTH} characters")
+    return _compile(expression)
+
+
+register_cache("conditions", lambda: (_compile.cache_info().hits, _compile.cache_info().misses))
+
+
+def validate_conditions(conditions: Optional[List[str]]) -> Optional[List[str]]:
+    """Check that every expression parses; used by request schemas."""
+    for expression in conditions or []:
+        compile_condition(expression)
+    return conditions
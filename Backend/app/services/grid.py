@@ -0,0 +1,59 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+# Corners of the grid cell around a point, as (row, column) offsets from its
+# south-west node: SW, SE, NW, NE
+CORNER_OFFSETS = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+
+def snap_to_grid(lat: float, lon: float, resolution: Optional[float] = None) -> Tuple[float, float]:
+    """Snap a point to the nearest node of the analysis grid."""
+    resolution = resolution or settings.GRID_RESOLUTION_DEG
+    return (
+        round(round(lat / resolution) * resolution, 6),
+        round(round(lon / resolution) * resolution, 6)
+    )
+
+def node_coordinates(row: int, column: int, resolution: Optional[float] = None) -> Tuple[float, float]:
+    """Latitude and longitude of a grid node, rounded like ``snap_to_grid``."""
+    resolution = resolution or settings.GRID_RESOLUTION_DEG
+    return round(row * resolution, 6), round(column * resolution, 6)
+
+def bilinear_weights(lats, lons, resolution: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Surrounding grid nodes and bilinear weights for many points at once.
+    
+    Returns integer node indices of shape (points, 4, 2), in ``CORNER_OFFSETS``
+    order, and weights of shape (points, 4) that sum to one per point.
+    """
+    resolution = resolution or settings.GRID_RESOLUTION_DEG
+    y = np.asarray(lats, dtype=float) / resolution
+    x = np.asarray(lons, dtype=float) / resolution
+    south, west = np.floor(y), np.floor(x)
+    fy, fx = y - south, x - west
+    weights = np.stack([(1 - fy) * (1 - fx), (1 - fy) * fx, fy * (1 - fx), fy * fx], axis=1)
+    origin = np.stack([south, west], axis=1).astype(np.int64)
+    return origin[:, None, :] + CORNER_OFFSETS, weights
+
+def elevation_weights(weights: np.ndarray, point_elevations: np.ndarray, node_elevations: np.ndarray, scale: float) -> np.ndarray:
+    """Down-weight nodes whose elevation differs from the point's.
+    
+    Each weight is scaled by ``exp(-|dz| / scale)`` and renormalized, so a
+    valley point leans on valley nodes rather than the ridge next to it.
+    """
+    adjusted = weights * np.exp(-np.abs(node_elevations - point_elevations[:, None]) / scale)
+    total = adjusted.sum(axis=1, keepdims=True)
+    return np.divide(adjusted, total, out=weights.copy(), where=total > 0)
+
+def interpolate(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Weighted mean over the corner axis of ``values`` (points, 4, ...).
+    
+    NaN marks a node without data; its weight is shared among the other
+    nodes. Points with no data at any weighted node stay NaN.
+    """
+    weights = weights.reshape(weights.shape + (1,) * (values.ndim - 2))
+    valid = ~np.isnan(values) & (weights > 0)
+    numerator = np.where(valid, values * weights, 0.0).sum(axis=1)
+    denominator = np.where(valid, weights, 0.0).sum(axis=1)
+    return np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator > 0)
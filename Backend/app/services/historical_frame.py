@@ -0,0 +1,179 @@
+import io
+from datetime import datetime
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Variables requested from the historical provider, in storage order
+METEOMATICS_PARAMETERS = [
+    "t_2m:C",
+    "precip_1h:mm",
+    "relative_humidity_2m:p",
+    "wind_speed_10m:ms",
+]
+
+HOURS_PER_DAY = 24
+
+
+def same_day_in_year(date: datetime, year: int) -> datetime:
+    """``date`` moved to ``year``; Feb 29 becomes Feb 28 in common years."""
+    try:
+        return date.replace(year=year)
+    except ValueError:
+        return date.replace(year=year, day=28)
+
+
+class HistoricalFrame:
+    """Columnar container for historical hourly observations.
+
+    Every variable is stored in one preallocated float32 row of a 2-D array,
+    alongside an int8 hour index, an int16 year index and an int32 index of
+    the fetched slice (day) each row came from. Fetchers reserve
+    rows and write straight into them, and aggregations read zero-copy views,
+    so a request never builds, concatenates or copies per-day DataFrames.
+    Variables a provider did not return stay NaN and are reported as absent.
+    """
+
+    def __init__(self, capacity: int, parameters: Optional[List[str]] = None):
+        self.parameters = list(parameters or METEOMATICS_PARAMETERS)
+        self._index = {name: i for i, name in enumerate(self.parameters)}
+        self._values = np.full((len(self.parameters), capacity), np.nan, dtype=np.float32)
+        self._hours = np.zeros(capacity, dtype=np.int8)
+        self._years = np.zeros(capacity, dtype=np.int16)
+        self._slice_ids = np.zeros(capacity, dtype=np.int32)
+        self._present = set()
+        self.size = 0
+        self.slices = 0
+
+    @classmethod
+    def for_window(cls, years: int, days_range: int, parameters: Optional[List[str]] = None) -> "HistoricalFrame":
+        """Allocate a frame large enough for a full historical window."""
+        capacity = years * (2 * days_range + 1) * HOURS_PER_DAY
+        return cls(capacity, parameters)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def empty(self) -> bool:
+        return self.size == 0
+
+    @property
+    def capacity(self) -> int:
+        return self._hours.shape[0]
+
+    @property
+    def hours(self) -> np.ndarray:
+        return self._hours[:self.size]
+
+    @property
+    def years(self) -> np.ndarray:
+        return self._years[:self.size]
+
+    @property
+    def slice_ids(self) -> np.ndarray:
+        """Index of the slice each row belongs to, from 0 to ``slices - 1``."""
+        return self._slice_ids[:self.size]
+
+    def has(self, name: str) -> bool:
+        return name in self._present
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a read-only view of one variable over the filled rows."""
+        view = self._values[self._index[name], :self.size]
+        view.flags.writeable = False
+        return view
+
+    def reserve(self, rows: int, year: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Reserve ``rows`` rows for one fetched slice.
+
+        Returns writable views of the hour index and of every variable column
+        for the reserved rows. Columns that are written should be passed to
+        ``mark_present`` so aggregations know the provider returned them.
+        """
+        if rows <= 0:
+            return self._hours[:0], {name: self._values[i, :0] for name, i in self._index.items()}
+        start = self.size
+        end = start + rows
+        if end > self.capacity:
+            self._grow(end)
+        self._years[start:end] = year
+        self._slice_ids[start:end] = self.slices
+        self.size = end
+        self.slices += 1
+        columns = {name: self._values[i, start:end] for name, i in self._index.items()}
+        return self._hours[start:end], columns
+
+    def mark_present(self, *names: str):
+        self._present.update(name for name in names if name in self._index)
+
+    def append(self, hours: np.ndarray, year: int, columns: Dict[str, np.ndarray]) -> int:
+        """Copy one slice of provider data into the frame. Returns rows written."""
+        rows = len(hours)
+        hour_view, column_views = self.reserve(rows, year)
+        if rows == 0:
+            return 0
+        hour_view[:] = hours
+        for name, values in columns.items():
+            if name in column_views:
+                column_views[name][:] = values
+                self.mark_present(name)
+        return rows
+
+    def append_dataframe(self, df: "pd.DataFrame", year: int) -> int:
+        """Append a DataFrame indexed by timestamp, as returned by CSV parsers."""
+        if df.empty:
+            return 0
+        columns = {name: df[name].to_numpy(dtype=np.float32, copy=False) for name in df.columns if name in self._index}
+        return self.append(df.index.hour.to_numpy(), year, columns)
+
+    def clear(self):
+        """Drop all rows while keeping the allocated storage for reuse."""
+        self._values[:, :self.size] = np.nan
+        self._present.clear()
+        self.size = 0
+        self.slices = 0
+
+    def to_bytes(self) -> bytes:
+        """Serialize the filled rows, e.g. for the shared climatology cache."""
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            parameters=np.array(self.parameters),
+            present=np.array([name in self._present for name in self.parameters]),
+            values=self._values[:, :self.size],
+            hours=self.hours,
+            years=self.years,
+            slice_ids=self.slice_ids,
+            slices=np.array(self.slices)
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HistoricalFrame":
+        arrays = np.load(io.BytesIO(data))
+        parameters = arrays["parameters"].tolist()
+        hours = arrays["hours"]
+        frame = cls(len(hours), parameters)
+        frame._values[:] = arrays["values"]
+        frame._hours[:] = hours
+        frame._years[:] = arrays["years"]
+        frame._slice_ids[:] = arrays["slice_ids"]
+        frame.mark_present(*(name for name, present in zip(parameters, arrays["present"]) if present))
+        frame.size = len(hours)
+        frame.slices = int(arrays["slices"])
+        return frame
+
+    def _grow(self, required: int):
+        capacity = max(required, self.capacity * 2, HOURS_PER_DAY)
+        values = np.full((len(self.parameters), capacity), np.nan, dtype=np.float32)
+        values[:, :self.size] = self._values[:, :self.size]
+        hours = np.zeros(capacity, dtype=np.int8)
+        hours[:self.size] = self._hours[:self.size]
+        years = np.zeros(capacity, dtype=np.int16)
+        years[:self.size] = self._years[:self.size]
+        slice_ids = np.zeros(capacity, dtype=np.int32)
+        slice_ids[:self.size] = self._slice_ids[:self.size]
+        self._values, self._hours, self._years, self._slice_ids = values, hours, years, slice_ids
@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# A parsed content line: property name -> (parameters, value)
+Event = Dict[str, tuple]
+
+
+def escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;")
+        .replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """Fold a content line to 75-octet chunks as RFC 5545 requires."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    chunks, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split inside a multi-byte character
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        chunks.append(encoded[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(chunks) + "\r\n"
+
+
+def format_datetime(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def unescape_text(value: str) -> str:
+    return (
+        value.replace("\\n", "\n").replace("\\N", "\n")
+        .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+    )
+
+
+def unfold_lines(text: str) -> List[str]:
+    """Join RFC 5545 folded lines (continuations start with a space or tab)."""
+    lines: List[str] = []
+    for raw in text.splitlines():
+        if raw[:1] in (" ", "\t") and lines:
+            lines[-1] += raw[1:]
+        elif raw:
+            lines.append(raw)
+    return lines
+
+
+def parse_events(text: str) -> List[Event]:
+    """Parse the VEVENT components of an iCalendar document."""
+    events: List[Event] = []
+    current: Optional[Event] = None
+    for line in unfold_lines(text):
+        name_part, _, value = line.partition(":")
+        name, *param_parts = name_part.split(";")
+        name = name.upper()
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            current = {}
+        elif name == "END" and value.upper() == "VEVENT":
+            if current is not None:
+                events.append(current)
+            current = None
+        elif current is not None:
+            params = dict(part.split("=", 1) for part in param_parts if "=" in part)
+            current[name] = ({key.upper(): val for key, val in params.items()}, value)
+    return events
+
+
+def parse_datetime(value: str) -> datetime:
+    """Parse DATE or DATE-TIME values; UTC ``Z`` suffixes are dropped."""
+    value = value.rstrip("Z")
+    if "T" in value:
+        return datetime.strptime(value, "%Y%m%dT%H%M%S")
+    return datetime.strptime(value, "%Y%m%d")
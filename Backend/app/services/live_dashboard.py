@@ -0,0 +1,227 @@
+"""Shared live-dashboard topics pushed over WebSocket.
+
+Clients subscribe to ``(location, date)`` topics. Each topic is analyzed once
+per worker however many clients follow it, and re-checks a cheap version (the
+report rollups of its grid cell, the matching reports and the climatology
+window) every ``LIVE_REFRESH_SECONDS``. Only when that version moves is the
+analysis recomputed, and subscribers then receive just the top-level fields
+that changed.
+
+Every subscriber has a bounded outgoing queue. A client that lets it fill up,
+or takes longer than ``LIVE_SEND_TIMEOUT_SECONDS`` to accept a message, is
+evicted rather than slowing the topic down for everyone else.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import orjson
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal
+from app.services import report_archive
+from app.services.report_rollups import rollup_version
+from app.services.weather_service import WeatherService, hourly_records
+
+logger = logging.getLogger(__name__)
+
+TopicKey = Tuple[str, str]
+
+REPORT_FIELDS = (
+    "id", "user_id", "location", "latitude", "longitude", "report_date",
+    "weather_conditions", "description", "photos", "created_at"
+)
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def encode(message: Dict) -> str:
+    return orjson.dumps(message, option=JSON_OPTIONS).decode()
+
+
+def recent_reports(location: str, date: datetime) -> List[Dict]:
+    """Newest reports for a topic, filtered the way ``GET /api/reports`` filters.
+    
+    Archived months are read when ``date`` reaches back into them.
+    """
+    db = SessionLocal()
+    try:
+        reports = db.query(models.Report).filter(
+            models.Report.location.ilike(f"%{location}%"),
+            models.Report.report_date >= date
+        ).order_by(models.Report.report_date.desc()).limit(settings.LIVE_REPORTS_LIMIT).all()
+        rows = [{field: getattr(report, field) for field in REPORT_FIELDS} for report in reports]
+    finally:
+        db.close()
+    if len(rows) < settings.LIVE_REPORTS_LIMIT:
+        archived = report_archive.query_archive(report_archive.months_reached(date), location, date)
+        archived.sort(key=lambda row: row["report_date"], reverse=True)
+        rows += [
+            {field: row[field] for field in REPORT_FIELDS}
+            for row in archived[:settings.LIVE_REPORTS_LIMIT - len(rows)]
+        ]
+    return rows
+
+
+def topic_version(location: str, date: datetime, lat: float, lon: float) -> Tuple:
+    """Changes whenever the analysis or the report list of a topic may have."""
+    db = SessionLocal()
+    try:
+        reports = db.query(func.count(models.Report.id), func.max(models.Report.updated_at)).filter(
+            models.Report.location.ilike(f"%{location}%"),
+            models.Report.report_date >= date
+        ).one()
+        rollups = rollup_version(db, lat, lon, date)
+    finally:
+        db.close()
+    archive = report_archive.archive_version(report_archive.months_reached(date))
+    # The climatology cache rolls over with the year and the window settings
+    return (
+        datetime.now().year, settings.HISTORICAL_YEARS, settings.DAYS_RANGE,
+        *reports, *rollups, archive
+    )
+
+
+class Subscriber:
+    """One WebSocket connection and its bounded outgoing queue."""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(settings.LIVE_QUEUE_SIZE)
+        self.topics: Set[TopicKey] = set()
+        self.evicted = asyncio.Event()
+
+    def offer(self, message: str) -> bool:
+        """Queue a message without waiting; a full queue evicts the subscriber."""
+        if self.evicted.is_set():
+            return False
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.evicted.set()
+            return False
+        return True
+
+    async def send_forever(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(message), settings.LIVE_SEND_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                self.evicted.set()
+                return
+
+
+class Topic:
+    """The latest analysis of one ``(location, date)`` and who follows it."""
+
+    def __init__(self, location: str, date: str, hub: "LiveHub"):
+        self.location = location
+        self.date = date
+        self.hub = hub
+        self.subscribers: Set[Subscriber] = set()
+        self.version: Optional[Tuple] = None
+        self.fields: Dict[str, bytes] = {}
+        self.snapshot: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def message(self, kind: str, **content) -> str:
+        return encode({"type": kind, "location": self.location, "date": self.date, **content})
+
+    def broadcast(self, message: str):
+        for subscriber in list(self.subscribers):
+            if not subscriber.offer(message):
+                self.hub.disconnect(subscriber)
+
+    async def compute(self) -> Dict:
+        result = await self.hub.weather_service.analyze_weather_probability(
+            location=self.location,
+            start_date=self.date,
+            include_chart=False
+        )
+        result["hourly_probabilities"] = hourly_records(result["hourly_probabilities"])
+        result["reports"] = await asyncio.to_thread(
+            recent_reports, self.location, datetime.strptime(self.date, "%Y-%m-%d")
+        )
+        return result
+
+    def publish(self, data: Dict):
+        """Send the fields that differ from the last published analysis."""
+        fields = {name: orjson.dumps(value, option=JSON_OPTIONS) for name, value in data.items()}
+        changes = {name: data[name] for name, encoded in fields.items() if self.fields.get(name) != encoded}
+        removed = [name for name in self.fields if name not in fields]
+        first = not self.fields
+        self.fields = fields
+        # Serialized once per change, whatever the number of subscribers
+        self.snapshot = self.message("snapshot", data=data)
+        if first:
+            self.broadcast(self.snapshot)
+        elif changes or removed:
+            self.broadcast(self.message("update", changes=changes, removed=removed))
+
+    async def run_forever(self):
+        date = datetime.strptime(self.date, "%Y-%m-%d")
+        coords = await self.hub.weather_service.get_coordinates(self.location)
+        while True:
+            try:
+                version = await asyncio.to_thread(
+                    topic_version, self.location, date, coords["latitude"], coords["longitude"]
+                )
+                if version != self.version:
+                    self.publish(await self.compute())
+                    self.version = version
+            except Exception as e:
+                logger.exception("Live analysis of %s on %s failed", self.location, self.date)
+                self.broadcast(self.message("error", detail=str(e)))
+            await asyncio.sleep(settings.LIVE_REFRESH_SECONDS)
+
+
+class LiveHub:
+    """Topics of this worker, keyed by ``(location, date)``."""
+
+    def __init__(self, weather_service: Optional[WeatherService] = None):
+        self.weather_service = weather_service or WeatherService()
+        self.topics: Dict[TopicKey, Topic] = {}
+
+    def subscribe(self, subscriber: Subscriber, location: str, date: str) -> bool:
+        """Follow a topic; False when the subscriber already follows too many."""
+        key = (location, date)
+        if key in subscriber.topics:
+            return True
+        if len(subscriber.topics) >= settings.LIVE_MAX_TOPICS:
+            return False
+        topic = self.topics.get(key)
+        if topic is None:
+            topic = self.topics[key] = Topic(location, date, self)
+            topic.task = asyncio.create_task(topic.run_forever())
+        topic.subscribers.add(subscriber)
+        subscriber.topics.add(key)
+        # Late joiners start from the current analysis without recomputing it
+        if topic.snapshot is not None:
+            subscriber.offer(topic.snapshot)
+        return True
+
+    def unsubscribe(self, subscriber: Subscriber, location: str, date: str):
+        key = (location, date)
+        subscriber.topics.discard(key)
+        topic = self.topics.get(key)
+        if topic is None:
+            return
+        topic.subscribers.discard(subscriber)
+        if not topic.subscribers:
+            topic.task.cancel()
+            del self.topics[key]
+
+    def disconnect(self, subscriber: Subscriber):
+        for location, date in list(subscriber.topics):
+            self.unsubscribe(subscriber, location, date)
+
+    def close(self):
+        for topic in self.topics.values():
+            topic.task.cancel()
+        self.topics.clear()
+
+
+hub = LiveHub()
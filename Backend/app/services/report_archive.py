@@ -0,0 +1,248 @@
+"""Cold storage for old community reports.
+
+The ``reports`` table is the hot partition. Reports from months that ended
+more than REPORTS_HOT_DAYS ago are moved to one zstd-compressed Parquet
+file per month under REPORTS_ARCHIVE_DIR. They stay readable through
+``query_archive``, and ``get_reports`` only opens the months a query
+reaches. Archived reports are read-only. Run the job with
+``python -m app.services.report_archive`` or set
+REPORTS_ARCHIVE_INTERVAL_HOURS to run it in the background.
+
+Parquet support needs the optional ``pyarrow`` package.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = [
+    "id", "user_id", "location", "latitude", "longitude", "report_date",
+    "weather_conditions", "description", "photos", "created_at", "updated_at"
+]
+# Stored as JSON text, since their shape differs from report to report
+JSON_COLUMNS = ("weather_conditions", "photos")
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Report dates are stored as naive UTC; convert aware values to match."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def archive_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Reports dated before this are archived; always the start of a month."""
+    now = now or datetime.utcnow()
+    return month_start(now - timedelta(days=settings.REPORTS_HOT_DAYS))
+
+
+def month_path(month: datetime) -> str:
+    return os.path.join(settings.REPORTS_ARCHIVE_DIR, f"{month:%Y-%m}.parquet")
+
+
+def archived_months() -> List[datetime]:
+    if not os.path.isdir(settings.REPORTS_ARCHIVE_DIR):
+        return []
+    months = []
+    for name in os.listdir(settings.REPORTS_ARCHIVE_DIR):
+        if name.endswith(".parquet"):
+            try:
+                months.append(datetime.strptime(name[:-len(".parquet")], "%Y-%m"))
+            except ValueError:
+                continue
+    return sorted(months)
+
+
+def months_reached(date_from: Optional[datetime]) -> List[datetime]:
+    """Archived months a query for reports on or after ``date_from`` must read.
+    
+    ``None`` means every archived month; callers decide whether a query
+    without a date should read the archive at all.
+    """
+    months = archived_months()
+    if date_from is None:
+        return months
+    date_from = naive_utc(date_from)
+    return [month for month in months if next_month(month) > date_from]
+
+
+def archive_version(months: List[datetime]) -> Tuple:
+    """Changes whenever one of ``months`` is rewritten; used in ETags."""
+    version = []
+    for month in months:
+        stat = os.stat(month_path(month))
+        version.append((f"{month:%Y-%m}", stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+def _to_row(report: models.Report) -> Dict:
+    row = {column: getattr(report, column) for column in ARCHIVE_COLUMNS}
+    for column in JSON_COLUMNS:
+        row[column] = json.dumps(row[column]) if row[column] is not None else None
+    return row
+
+
+def _from_row(row: Dict) -> Dict:
+    for column in JSON_COLUMNS:
+        row[column] = json.loads(row[column]) if row[column] is not None else None
+    row["photos"] = row["photos"] or []
+    row["description"] = row["description"] or ""
+    return row
+
+
+def _write_month(month: datetime, rows: List[Dict]):
+    """Merge ``rows`` into the month's file; rows already archived are kept once."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = month_path(month)
+    table = pa.Table.from_pylist(rows, schema=_schema())
+    if os.path.exists(path):
+        existing = pq.read_table(path, schema=_schema())
+        new_ids = set(table.column("id").to_pylist())
+        keep = [row_id not in new_ids for row_id in existing.column("id").to_pylist()]
+        table = pa.concat_tables([existing.filter(pa.array(keep)), table])
+    table = table.sort_by([("report_date", "ascending"), ("id", "ascending")])
+
+    os.makedirs(settings.REPORTS_ARCHIVE_DIR, exist_ok=True)
+    # Replace atomically so readers never see a partial file
+    temporary = f"{path}.tmp"
+    pq.write_table(table, temporary, compression="zstd")
+    os.replace(temporary, path)
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("location", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("report_date", pa.timestamp("us")),
+        ("weather_conditions", pa.string()),
+        ("description", pa.string()),
+        ("photos", pa.string()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+    ])
+
+
+def archive_reports(db: Session, now: Optional[datetime] = None) -> int:
+    """Move reports older than the cutoff to Parquet, one month at a time.
+
+    Each month's file is written before its rows are deleted, and rewriting a
+    month drops duplicate ids, so an interrupted run is safe to repeat.
+    Returns the number of reports archived.
+    """
+    cutoff = archive_cutoff(now)
+    archived = 0
+    while True:
+        oldest = db.query(models.Report.report_date).filter(
+            models.Report.report_date < cutoff
+        ).order_by(models.Report.report_date).first()
+        if oldest is None:
+            return archived
+        month = month_start(oldest[0])
+        reports = db.query(models.Report).filter(
+            models.Report.report_date >= month,
+            models.Report.report_date < min(next_month(month), cutoff)
+        ).all()
+        _write_month(month, [_to_row(report) for report in reports])
+        db.query(models.Report).filter(
+            models.Report.id.in_([report.id for report in reports])
+        ).delete(synchronize_session=False)
+        db.commit()
+        archived += len(reports)
+        logger.info("Archived %s reports from %s", len(reports), f"{month:%Y-%m}")
+
+
+def query_archive(
+    months: List[datetime],
+    location: Optional[str] = None,
+    date_from: Optional[datetime] = None
+) -> List[Dict]:
+    """Archived reports in ``months`` matching the ``get_reports`` filters."""
+    if not months:
+        return []
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    filters = [("report_date", ">=", naive_utc(date_from))] if date_from is not None else None
+    rows = []
+    for month in months:
+        table = pq.read_table(month_path(month), filters=filters)
+        if location:
+            table = table.filter(pc.match_substring(table["location"], location, ignore_case=True))
+        rows.extend(_from_row(row) for row in table.to_pylist())
+    return rows
+
+
+def iter_archive(
+    months: List[datetime],
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = 1000
+) -> Iterator[Dict]:
+    """Archived reports in ``months``, read one record batch at a time.
+    
+    Only ``columns`` are read when given, so scanning the whole archive
+    holds a single batch in memory.
+    """
+    if not months:
+        return
+    import pyarrow.parquet as pq
+
+    for month in months:
+        parquet = pq.ParquetFile(month_path(month))
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+            for row in batch.to_pylist():
+                for column in JSON_COLUMNS:
+                    if row.get(column) is not None:
+                        row[column] = json.loads(row[column])
+                yield row
+
+
+class ArchiveJob:
+    """Runs ``archive_reports`` every REPORTS_ARCHIVE_INTERVAL_HOURS."""
+
+    async def run_forever(self):
+        while True:
+            try:
+                # File and database I/O stay off the event loop
+                await asyncio.to_thread(self.run_once)
+            except Exception:
+                logger.exception("Report archival failed")
+            await asyncio.sleep(settings.REPORTS_ARCHIVE_INTERVAL_HOURS * 3600)
+
+    def run_once(self) -> int:
+        db = SessionLocal()
+        try:
+            return archive_reports(db)
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    from app.db.database import Base, engine
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    print(f"Archived {ArchiveJob().run_once()} reports")
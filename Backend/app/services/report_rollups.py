@@ -0,0 +1,238 @@
+"""Per grid cell, per day counts of the conditions users report.
+
+Rollups are updated in the same transaction as the report itself, so reading
+community statistics never scans ``Report.weather_conditions``. Rebuild them
+from the reports table and the report archive with
+``python -m app.services.report_rollups``.
+"""
+from collections import Counter
+from datetime import date as Date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services.grid import snap_to_grid
+from app.services.historical_frame import same_day_in_year
+from app.services.report_archive import archived_months, iter_archive
+
+# Rollup rows under this name count every report, whatever it observed
+ALL_REPORTS = "*"
+
+CONDITION_ALIASES = {
+    "rainy": "rain",
+    "clouds": "cloudy",
+    "overcast": "cloudy",
+    "sun": "sunny",
+    "clear": "sunny",
+    "wind": "high_wind",
+    "windy": "high_wind",
+}
+
+# (cell latitude, cell longitude, day, condition)
+RollupKey = Tuple[float, float, Date, str]
+
+
+def normalize_condition_name(name: str) -> str:
+    name = name.strip().lower().replace("-", "_").replace(" ", "_")
+    return CONDITION_ALIASES.get(name, name)
+
+
+def observed_conditions(weather_conditions: Optional[Dict]) -> Set[str]:
+    """Condition names a report marks as observed.
+
+    Reports are free-form, so this accepts flags (``{"rain": true}``), a list
+    under ``"conditions"`` and a single name under ``"condition"``. Other
+    values, such as measured temperatures, are ignored.
+    """
+    if not isinstance(weather_conditions, dict):
+        return set()
+    names = [key for key, value in weather_conditions.items() if value is True]
+    listed = weather_conditions.get("conditions")
+    if isinstance(listed, list):
+        names.extend(value for value in listed if isinstance(value, str))
+    single = weather_conditions.get("condition")
+    if isinstance(single, str):
+        names.append(single)
+    return {normalize_condition_name(name) for name in names if name.strip()} - {ALL_REPORTS}
+
+
+def rollup_keys(report: models.Report) -> List[RollupKey]:
+    """Rollup rows a report contributes to; none without coordinates."""
+    if report.latitude is None or report.longitude is None or report.report_date is None:
+        return []
+    cell_lat, cell_lon = snap_to_grid(report.latitude, report.longitude)
+    day = report.report_date.date()
+    conditions = {ALL_REPORTS} | observed_conditions(report.weather_conditions)
+    return [(cell_lat, cell_lon, day, condition) for condition in sorted(conditions)]
+
+
+def _upsert_statement(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(models.ReportRollup)
+
+
+def increment(db: Session, keys: Iterable[RollupKey], delta: int):
+    """Add ``delta`` to each rollup row, creating missing rows.
+
+    Uses a single INSERT ... ON CONFLICT on SQLite and PostgreSQL, so
+    concurrent reports in one cell never lose an update.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {"cell_latitude": lat, "cell_longitude": lon, "day": day, "condition": condition,
+         "count": delta, "updated_at": now}
+        for lat, lon, day, condition in keys
+    ]
+    stmt = _upsert_statement(db)
+    if stmt is not None:
+        stmt = stmt.values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["cell_latitude", "cell_longitude", "day", "condition"],
+            set_={"count": models.ReportRollup.count + stmt.excluded.count, "updated_at": now}
+        ))
+        return
+
+    for row in rows:
+        updated = db.query(models.ReportRollup).filter(
+            models.ReportRollup.cell_latitude == row["cell_latitude"],
+            models.ReportRollup.cell_longitude == row["cell_longitude"],
+            models.ReportRollup.day == row["day"],
+            models.ReportRollup.condition == row["condition"]
+        ).update({"count": models.ReportRollup.count + delta, "updated_at": now}, synchronize_session=False)
+        if not updated:
+            db.add(models.ReportRollup(**row))
+
+
+def add_report(db: Session, report: models.Report):
+    increment(db, rollup_keys(report), 1)
+
+
+def remove_report(db: Session, report: models.Report):
+    """Subtract a report, dropping rows that reach zero.
+
+    Reports that predate the rollups were never counted, so their rows can
+    go below zero; those are dropped as well rather than kept negative.
+    """
+    keys = rollup_keys(report)
+    increment(db, keys, -1)
+    for lat, lon, day, condition in keys:
+        db.query(models.ReportRollup).filter(
+            models.ReportRollup.cell_latitude == lat,
+            models.ReportRollup.cell_longitude == lon,
+            models.ReportRollup.day == day,
+            models.ReportRollup.condition == condition,
+            models.ReportRollup.count <= 0
+        ).delete(synchronize_session=False)
+
+
+def window_days(date: datetime, days: int, years: int) -> List[Date]:
+    """The same calendar days (+/- ``days``) in each of the last ``years`` years and this one."""
+    current_year = datetime.utcnow().year
+    result = []
+    for year in range(current_year - years, current_year + 1):
+        center = same_day_in_year(date, year)
+        result.extend((center + timedelta(days=offset)).date() for offset in range(-days, days + 1))
+    return result
+
+
+def observed_frequencies(
+    db: Session,
+    lat: float,
+    lon: float,
+    date: datetime,
+    days: Optional[int] = None,
+    years: Optional[int] = None
+) -> Dict:
+    """How often each condition was reported in the grid cell around ``date``.
+
+    Uses the same seasonal window as the historical analysis. Frequencies are
+    percentages of all reports in the window.
+    """
+    days = settings.DAYS_RANGE if days is None else days
+    years = settings.HISTORICAL_YEARS if years is None else years
+    cell_lat, cell_lon = snap_to_grid(lat, lon)
+    rows = db.query(models.ReportRollup.condition, func.sum(models.ReportRollup.count)).filter(
+        models.ReportRollup.cell_latitude == cell_lat,
+        models.ReportRollup.cell_longitude == cell_lon,
+        models.ReportRollup.day.in_(window_days(date, days, years)),
+        models.ReportRollup.count > 0
+    ).group_by(models.ReportRollup.condition).all()
+
+    counts = {condition: int(count) for condition, count in rows if count > 0}
+    total = counts.pop(ALL_REPORTS, 0)
+    return {
+        "cell": {"latitude": cell_lat, "longitude": cell_lon},
+        "reports": total,
+        "counts": counts,
+        "frequencies": {condition: count / total * 100 for condition, count in counts.items()} if total else {}
+    }
+
+
+def rollup_version(db: Session, lat: float, lon: float, date: datetime) -> Tuple:
+    """Cheap change marker for the rollups ``observed_frequencies`` reads."""
+    cell_lat, cell_lon = snap_to_grid(lat, lon)
+    return db.query(func.sum(models.ReportRollup.count), func.max(models.ReportRollup.updated_at)).filter(
+        models.ReportRollup.cell_latitude == cell_lat,
+        models.ReportRollup.cell_longitude == cell_lon,
+        models.ReportRollup.day.in_(window_days(date, settings.DAYS_RANGE, settings.HISTORICAL_YEARS))
+    ).one()
+
+
+def rebuild_rollups(db: Session, batch_size: int = 1000) -> int:
+    """Recompute every rollup from all reports, archived ones included.
+    
+    Returns the number of reports counted.
+    """
+    counts: Counter = Counter()
+    reports = 0
+    query = db.query(
+        models.Report.latitude, models.Report.longitude,
+        models.Report.report_date, models.Report.weather_conditions
+    ).yield_per(batch_size)
+    for report in query:
+        keys = rollup_keys(report)
+        counts.update(keys)
+        reports += bool(keys)
+    archived = iter_archive(
+        archived_months(),
+        columns=["latitude", "longitude", "report_date", "weather_conditions"],
+        batch_size=batch_size
+    )
+    for row in archived:
+        keys = rollup_keys(SimpleNamespace(**row))
+        counts.update(keys)
+        reports += bool(keys)
+
+    db.query(models.ReportRollup).delete(synchronize_session=False)
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(models.ReportRollup, [
+        {"cell_latitude": lat, "cell_longitude": lon, "day": day, "condition": condition,
+         "count": count, "updated_at": now}
+        for (lat, lon, day, condition), count in counts.items()
+    ])
+    db.commit()
+    return reports
+
+
+if __name__ == "__main__":
+    from app.db.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        print(f"Rolled up {rebuild_rollups(session)} reports")
+    finally:
+        session.close()
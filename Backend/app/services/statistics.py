@@ -0,0 +1,102 @@
+"""Confidence intervals for probabilities estimated from historical data.
+
+Everything is vectorized over the estimated quantities, so intervals for
+every hour and condition of an analysis are computed in one pass.
+"""
+from statistics import NormalDist
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+Interval = Tuple[np.ndarray, np.ndarray]
+
+# Fixed so that repeated analyses of the same data return the same intervals
+BOOTSTRAP_SEED = 0
+
+
+def z_score(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(hits, n, confidence: float = 0.95) -> Interval:
+    """Wilson score interval of ``hits / n`` in percent; NaN where ``n`` is 0."""
+    hits = np.asarray(hits, dtype=float)
+    n = np.asarray(n, dtype=float)
+    z2 = z_score(confidence) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = hits / n
+        denominator = 1 + z2 / n
+        center = (p + z2 / (2 * n)) / denominator
+        half_width = np.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) * np.sqrt(z2) / denominator
+    low = np.where(n > 0, np.clip(center - half_width, 0, 1) * 100, np.nan)
+    high = np.where(n > 0, np.clip(center + half_width, 0, 1) * 100, np.nan)
+    return low, high
+
+
+def resample_weights(units: int, resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """How often each unit is drawn in each resample, shape (resamples, units)."""
+    draws = rng.integers(0, units, size=(resamples, units))
+    draws += np.arange(resamples)[:, None] * units
+    return np.bincount(draws.ravel(), minlength=resamples * units).reshape(resamples, units).astype(np.float32)
+
+
+def sorted_percentiles(samples: np.ndarray, quantiles) -> np.ndarray:
+    """Linear-interpolated quantiles along axis 0, ignoring NaN samples."""
+    ordered = np.sort(samples, axis=0)
+    valid = (~np.isnan(ordered)).sum(axis=0)
+    result = []
+    for q in quantiles:
+        position = q * np.maximum(valid - 1, 0)
+        below = np.floor(position).astype(np.intp)
+        above = np.minimum(below + 1, np.maximum(valid - 1, 0))
+        low = np.take_along_axis(ordered, below[None], axis=0)[0]
+        high = np.take_along_axis(ordered, above[None], axis=0)[0]
+        value = low + (high - low) * (position - below)
+        result.append(np.where(valid > 0, value, np.nan))
+    return np.array(result)
+
+
+def bootstrap_interval(
+    numerators: np.ndarray,
+    denominators: np.ndarray,
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    rng: Optional[np.random.Generator] = None
+) -> Interval:
+    """Percentile bootstrap interval of ratio estimates, in percent.
+
+    ``numerators`` and ``denominators`` have shape (units, estimates): each
+    estimate is ``numerators.sum(0) / denominators.sum(0)``. Whole units (days)
+    are resampled, which keeps the correlation between hours of the same day.
+    All resamples are drawn at once as a matrix of unit multiplicities, so
+    the resampled sums are two matrix products.
+    """
+    rng = rng or np.random.default_rng(BOOTSTRAP_SEED)
+    units = numerators.shape[0]
+    if units == 0:
+        empty = np.full(numerators.shape[1], np.nan)
+        return empty, empty.copy()
+    weights = resample_weights(units, resamples, rng)
+    # float32 halves the cost of sorting the resampled ratios
+    sums = weights @ numerators.astype(np.float32)
+    counts = weights @ denominators.astype(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = sums / counts
+    alpha = (1 - confidence) / 2
+    low, high = np.round(sorted_percentiles(ratios, (alpha, 1 - alpha)).astype(float) * 100, 4)
+    return low, high
+
+
+def proportion_interval(numerators: np.ndarray, denominators: np.ndarray) -> Interval:
+    """Interval for per-unit counts using the configured method and level.
+
+    ``CONFIDENCE_INTERVAL_METHOD`` is ``wilson`` (closed form on the totals)
+    or ``bootstrap`` (resampling units with ``BOOTSTRAP_RESAMPLES`` draws).
+    """
+    if settings.CONFIDENCE_INTERVAL_METHOD == "bootstrap":
+        return bootstrap_interval(
+            numerators, denominators, settings.CONFIDENCE_LEVEL, settings.BOOTSTRAP_RESAMPLES
+        )
+    return wilson_interval(numerators.sum(axis=0), denominators.sum(axis=0), settings.CONFIDENCE_LEVEL)
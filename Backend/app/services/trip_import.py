@@ -0,0 +1,57 @@
+import csv
+import io
+from typing import Dict, List
+
+from app.services.ical import parse_datetime, parse_events, unescape_text
+
+CSV_FIELDS = [
+    "name", "location", "latitude", "longitude",
+    "start_date", "end_date", "activity_type", "conditions_checklist"
+]
+
+
+def parse_trips_csv(text: str) -> List[Dict]:
+    """Read trips from CSV with a header row using the ``CSV_FIELDS`` names.
+
+    ``conditions_checklist`` holds several conditions separated by ``;``.
+    Dates may omit the time. Empty cells are treated as missing so schema
+    defaults apply.
+    """
+    rows = []
+    for record in csv.DictReader(io.StringIO(text)):
+        row = {key: value.strip() for key, value in record.items() if key in CSV_FIELDS and value and value.strip()}
+        for field in ("start_date", "end_date"):
+            if len(row.get(field, "")) == 10:
+                row[field] += "T00:00:00"
+        if "conditions_checklist" in row:
+            row["conditions_checklist"] = [c.strip() for c in row["conditions_checklist"].split(";") if c.strip()]
+        rows.append(row)
+    return rows
+
+
+def parse_trips_ical(text: str) -> List[Dict]:
+    """Read one trip per VEVENT: SUMMARY, LOCATION, DTSTART, DTEND and GEO.
+
+    Unparseable dates are passed through as text so validation reports them.
+    """
+    rows = []
+    for event in parse_events(text):
+        row = {}
+        if "SUMMARY" in event:
+            row["name"] = unescape_text(event["SUMMARY"][1])
+        if "LOCATION" in event:
+            row["location"] = unescape_text(event["LOCATION"][1])
+        for prop, field in (("DTSTART", "start_date"), ("DTEND", "end_date")):
+            if prop in event:
+                value = event[prop][1]
+                try:
+                    row[field] = parse_datetime(value)
+                except ValueError:
+                    row[field] = value
+        if "GEO" in event:
+            lat, _, lon = event["GEO"][1].partition(";")
+            row["latitude"], row["longitude"] = lat, lon
+        if "CATEGORIES" in event:
+            row["activity_type"] = unescape_text(event["CATEGORIES"][1]).split(",")[0]
+        rows.append(row)
+    return rows
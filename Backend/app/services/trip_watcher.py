@@ -0,0 +1,213 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.conditions import ConditionSyntaxError, compile_condition
+from app.services.grid import snap_to_grid
+from app.services.aggregation import HourlyAccumulator
+from app.services.historical_frame import HistoricalFrame
+from app.services.weather_service import HOURLY_CONDITIONS, WeatherService
+
+logger = logging.getLogger(__name__)
+
+# (cell latitude, cell longitude, month, day): historical analyses only depend
+# on the calendar day, so trips in the same cell on the same day share one
+AnalysisKey = Tuple[float, float, int, int]
+Notifier = Callable[[models.Trip, Optional[Dict], Dict], Optional[Awaitable[None]]]
+
+
+def log_change(trip: models.Trip, previous: Optional[Dict], current: Dict):
+    logger.info("Weather outlook changed for trip %s (%s): %s -> %s", trip.id, trip.name, previous, current)
+
+
+def _flatten(probabilities: Dict) -> Dict[str, float]:
+    flat = {key: value for key, value in probabilities.items() if key != "conditions"}
+    for expression, value in probabilities.get("conditions", {}).items():
+        flat[f"conditions.{expression}"] = value
+    return flat
+
+
+def has_changed(previous: Optional[Dict], current: Dict, threshold: float) -> bool:
+    """True when any probability moved by more than ``threshold`` points."""
+    if previous is None:
+        return True
+    old, new = _flatten(previous), _flatten(current)
+    if old.keys() != new.keys():
+        return True
+    for key, value in new.items():
+        if (value is None) != (old[key] is None):
+            return True
+        if value is not None and abs(value - old[key]) > threshold:
+            return True
+    return False
+
+
+class TripWatcher:
+    """Periodically re-analyzes upcoming trips in batches.
+
+    Trips are grouped by grid cell and calendar day so each distinct
+    historical analysis is fetched once per batch, whatever the number of
+    trips sharing it, and later batches read it from the climatology cache. Results are written to ``TripForecast`` only when a
+    probability moves beyond the configured threshold.
+    """
+
+    def __init__(self, weather_service: Optional[WeatherService] = None, notify: Notifier = log_change):
+        self.weather_service = weather_service or WeatherService()
+        self.notify = notify
+
+    async def run_forever(self):
+        interval = settings.TRIP_WATCH_INTERVAL_MINUTES * 60
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Trip watcher run failed")
+            await asyncio.sleep(interval)
+
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Re-analyze every upcoming trip once. Returns run statistics."""
+        now = now or datetime.utcnow()
+        horizon = now + timedelta(days=settings.TRIP_WATCH_HORIZON_DAYS)
+        stats = {"trips": 0, "analyses": 0, "changed": 0}
+        last_id = 0
+
+        while True:
+            db = SessionLocal()
+            try:
+                batch = self.load_batch(db, now, horizon, last_id)
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                stats["trips"] += len(batch)
+                await self.process_batch(db, batch, now, stats)
+                db.commit()
+            finally:
+                db.close()
+
+        return stats
+
+    def load_batch(self, db: Session, now: datetime, horizon: datetime, last_id: int) -> List[models.Trip]:
+        return db.query(models.Trip).options(joinedload(models.Trip.forecast)).filter(
+            models.Trip.id > last_id,
+            models.Trip.end_date >= now,
+            models.Trip.start_date <= horizon
+        ).order_by(models.Trip.id).limit(settings.TRIP_WATCH_BATCH_SIZE).all()
+
+    async def process_batch(self, db: Session, trips: List[models.Trip], now: datetime, stats: Dict[str, int]):
+        """Analyze one batch; frames live only as long as their group.
+
+        Each group's trips are reduced to probabilities before the next group
+        is fetched, so memory is bounded by one historical window whatever
+        the number of trips. Later batches sharing a key hit the climatology
+        cache.
+        """
+        groups: Dict[AnalysisKey, List[models.Trip]] = {}
+        for trip in trips:
+            try:
+                key = await self.analysis_key(trip, now)
+            except Exception:
+                logger.exception("Could not locate trip %s", trip.id)
+                continue
+            groups.setdefault(key, []).append(trip)
+
+        for key, group in groups.items():
+            try:
+                stats["analyses"] += 1
+                checklists = {trip.id: tuple(self.valid_conditions(trip)) for trip in group}
+                results = await self.analyze_group(key, set(checklists.values()))
+                for trip in group:
+                    if await self.update_forecast(db, trip, key, results[checklists[trip.id]], now):
+                        stats["changed"] += 1
+            except Exception:
+                # One failing location must not starve the remaining trips
+                logger.exception("Could not re-analyze trips %s for %s", [trip.id for trip in group], key)
+
+    async def analyze_group(self, key: AnalysisKey, checklists: Set[Tuple[str, ...]]) -> Dict[Tuple[str, ...], Dict]:
+        """Probabilities at ``key`` for each distinct checklist."""
+        lat, lon, month, day = key
+        # The year is replaced by each historical year; 2000 admits Feb 29,
+        # which becomes Feb 28 in common years
+        date = datetime(2000, month, day)
+        if self.weather_service.use_streaming():
+            results = {}
+            for conditions in checklists:
+                accumulator = await self.weather_service.aggregate_historical(lat, lon, date, list(conditions))
+                results[conditions] = self.probabilities_from(accumulator)
+            return results
+        frame = await self.weather_service.get_historical_frame(lat, lon, date)
+        return {conditions: self.calculate_probabilities(frame, list(conditions)) for conditions in checklists}
+
+    async def analysis_key(self, trip: models.Trip, now: datetime) -> AnalysisKey:
+        if trip.latitude is not None and trip.longitude is not None:
+            lat, lon = trip.latitude, trip.longitude
+        else:
+            coords = await self.weather_service.get_coordinates(trip.location)
+            lat, lon = coords["latitude"], coords["longitude"]
+        cell_lat, cell_lon = snap_to_grid(lat, lon)
+        # Trips already under way are judged on their remaining days
+        date = max(trip.start_date, now)
+        return cell_lat, cell_lon, date.month, date.day
+
+    def valid_conditions(self, trip: models.Trip) -> List[str]:
+        conditions = []
+        for expression in trip.conditions_checklist or []:
+            try:
+                compile_condition(expression)
+                conditions.append(expression)
+            except ConditionSyntaxError:
+                logger.warning("Skipping invalid condition %r on trip %s", expression, trip.id)
+        return conditions
+
+    def calculate_probabilities(self, frame: HistoricalFrame, conditions: List[str]) -> Dict:
+        probabilities = {
+            column: compile_condition(condition).probability(frame)
+            for column, condition in HOURLY_CONDITIONS.items()
+        }
+        probabilities["conditions"] = self.weather_service.calculate_condition_probabilities(frame, conditions)
+        probabilities["checklist"] = self.weather_service.calculate_checklist_probability(frame, conditions)
+        return probabilities
+
+    def probabilities_from(self, accumulator: HourlyAccumulator) -> Dict:
+        """The same probabilities as ``calculate_probabilities``, from streamed counters."""
+        probabilities = {column: 0.0 for column in HOURLY_CONDITIONS}
+        if not accumulator.empty:
+            numerators, denominators = accumulator.hourly_statistics()
+            hits = numerators.sum(axis=0).reshape(len(HOURLY_CONDITIONS), -1).sum(axis=1)
+            observations = denominators.sum(axis=0).reshape(len(HOURLY_CONDITIONS), -1).sum(axis=1)
+            for column, matched, total in zip(HOURLY_CONDITIONS, hits, observations):
+                probabilities[column] = float(matched / total * 100) if total else 0.0
+        probabilities["conditions"] = accumulator.condition_probabilities()
+        probabilities["checklist"] = accumulator.checklist_probability()
+        return probabilities
+
+    async def update_forecast(
+        self,
+        db: Session,
+        trip: models.Trip,
+        key: AnalysisKey,
+        current: Dict,
+        now: datetime
+    ) -> bool:
+        forecast = trip.forecast
+        previous = forecast.probabilities if forecast else None
+        if not has_changed(previous, current, settings.TRIP_WATCH_CHANGE_THRESHOLD):
+            return False
+
+        if forecast is None:
+            forecast = models.TripForecast(trip_id=trip.id)
+            db.add(forecast)
+        forecast.cell_latitude, forecast.cell_longitude = key[0], key[1]
+        forecast.probabilities = current
+        forecast.checked_at = now
+        forecast.changed_at = now
+
+        result = self.notify(trip, previous, current)
+        if asyncio.iscoroutine(result):
+            await result
+        return True
@@ -1,13 +1,54 @@
+import asyncio
 import requests
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import orjson
 import io
 import base64
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 from app.core.config import settings
+from app.core.observability import stage, upstream
+from app.core.shared_cache import climatology_cache, community_cache
+from app.db.database import SessionLocal
+from app.services.historical_frame import HistoricalFrame, same_day_in_year
+from app.services.conditions import compile_condition
+from app.services.grid import bilinear_weights, elevation_weights, interpolate, node_coordinates, snap_to_grid
+from app.services.report_rollups import observed_frequencies
+from app.services.statistics import proportion_interval
+from app.services.aggregation import Counts, HourlyAccumulator, daily_counts, hourly_statistics, summary_statistics
+
+# Hourly probability columns and the named conditions that define them
+HOURLY_CONDITIONS = {
+    'rain_prob': 'rain',
+    'cloudy_prob': 'cloudy',
+    'sunny_prob': 'sunny',
+    'high_wind_prob': 'high_wind',
+}
+
+# Column name -> array over the observed hours
+HourlyProbabilities = Dict[str, np.ndarray]
+
+def _figure_class():
+    """Import matplotlib on first use, pinned to the headless Agg backend.
+    
+    Keeps matplotlib out of worker startup; set PRELOAD_ANALYSIS to import it
+    in the parent process instead so forked workers share it.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    return Figure
+
+def preload_analysis_stack():
+    """Import the lazily loaded analysis dependencies ahead of first use."""
+    _figure_class()
+
+def hourly_records(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """Convert column-oriented hourly probabilities to one dict per hour."""
+    names = list(columns)
+    rows = zip(*(columns[name].tolist() for name in names))
+    return [dict(zip(names, row)) for row in rows]
 
 class WeatherService:
     def __init__(self):
@@ -22,45 +63,83 @@ class WeatherService:
         start_date: str,
         end_date: Optional[str] = None,
         conditions_checklist: List[str] = [],
-        activity_profile: Optional[str] = None
+        activity_profile: Optional[str] = None,
+        include_chart: bool = True
     ):
-        """Main method to analyze weather probability."""
+        """Main method to analyze weather probability.
+        
+        Hourly probabilities are returned column-oriented as NumPy arrays;
+        use ``hourly_records`` for the row-per-hour layout.
+        """
         # Get coordinates
-        coords = await self.get_coordinates(location)
+        with stage("geocode"):
+            coords = await self.get_coordinates(location)
         lat, lon = coords['latitude'], coords['longitude']
         
         # Parse date
         date = datetime.strptime(start_date, "%Y-%m-%d")
         
         # Fetch historical data
-        historical_dfs = await self.get_historical_dfs(lat, lon, date)
-        
-        # Combine data
-        df_combined = pd.concat(historical_dfs) if historical_dfs else pd.DataFrame()
+        grid = accumulator = None
+        with stage("fetch"):
+            if settings.GRIDDED_ANALYSIS:
+                grid = await self.interpolate_probabilities([lat], [lon], date, conditions_checklist)
+                # The nearest node is one of the interpolated cells, so this is cached
+                frame = await self.get_historical_frame(*snap_to_grid(lat, lon), date)
+            elif self.use_streaming():
+                accumulator = await self.aggregate_historical(lat, lon, date, conditions_checklist)
+            else:
+                frame = await self.get_historical_frame(lat, lon, date)
         
         # Calculate probabilities
-        if not df_combined.empty:
-            hourly_probs = self.calculate_hourly_probabilities(df_combined)
-            summary = self.calculate_summary(df_combined)
-        else:
-            hourly_probs = pd.DataFrame()
-            summary = {}
+        with stage("probabilities"):
+            if grid is not None:
+                hourly_probs, condition_probs, checklist_prob = self.point_probabilities(grid, 0, conditions_checklist)
+                summary = self.calculate_summary(frame) if not frame.empty else {}
+            elif accumulator is not None and not accumulator.empty:
+                hourly_probs = self.hourly_probabilities_from(accumulator.hourly_statistics())
+                summary = self.summary_from(accumulator.summary_statistics(), accumulator.days, accumulator.observations)
+                condition_probs = accumulator.condition_probabilities()
+                checklist_prob = accumulator.checklist_probability()
+            elif accumulator is None and not frame.empty:
+                hourly_probs = self.calculate_hourly_probabilities(frame)
+                summary = self.calculate_summary(frame)
+                condition_probs = self.calculate_condition_probabilities(frame, conditions_checklist)
+                checklist_prob = self.calculate_checklist_probability(frame, conditions_checklist)
+            else:
+                # Typed empty columns with the same names as real results
+                hourly_probs = {'hour': np.empty(0, dtype=int)}
+                for column in HOURLY_CONDITIONS:
+                    for name in (column, f'{column}_low', f'{column}_high'):
+                        hourly_probs[name] = np.empty(0)
+                summary = {}
+                condition_probs = {}
+                checklist_prob = None
+        
+        # Blend in what the community actually reported around this date
+        with stage("community"):
+            community = await self.get_community_observations(lat, lon, date)
+            hourly_probs = self.blend_community_observations(hourly_probs, community)
         
         # Generate chart
-        chart_base64 = self.generate_chart(hourly_probs, location, start_date)
+        with stage("chart"):
+            chart_base64 = self.generate_chart(hourly_probs, location, start_date) if include_chart else None
         
         # Generate summary text
-        summary_text = self.generate_summary_text(summary, conditions_checklist)
+        summary_text = self.generate_summary_text(summary, condition_probs, checklist_prob)
         
         # Calculate confidence level
-        confidence = self.calculate_confidence(len(historical_dfs))
+        confidence = self.calculate_confidence(summary)
         
         return {
             "location": location,
             "coordinates": {"latitude": lat, "longitude": lon},
             "date": start_date,
             "summary": summary,
-            "hourly_probabilities": hourly_probs.to_dict('records') if not hourly_probs.empty else [],
+            "hourly_probabilities": hourly_probs,
+            "condition_probabilities": condition_probs,
+            "checklist_probability": checklist_prob,
+            "community_reports": community["reports"],
             "confidence_level": confidence,
             "summary_text": summary_text,
             "chart_base64": chart_base64
@@ -72,64 +151,294 @@ class WeatherService:
         # For now, return dummy data
         return {"latitude": 15.272923, "longitude": 73.958159}
     
-    async def get_historical_dfs(self, lat: float, lon: float, date: datetime) -> List[pd.DataFrame]:
-        """Fetch historical weather data."""
-        dfs = []
+    async def get_historical_frame(self, lat: float, lon: float, date: datetime) -> HistoricalFrame:
+        """Fetch historical weather data into a preallocated columnar frame.
+        
+        Frames are shared between workers through the climatology cache.
+        """
         current_year = datetime.now().year
+        cache_key = f"frame:{lat:.4f}:{lon:.4f}:{date:%m-%d}:{current_year}:{settings.HISTORICAL_YEARS}:{settings.DAYS_RANGE}"
+        cached = climatology_cache.get(cache_key)
+        if cached is not None:
+            return HistoricalFrame.from_bytes(cached)
+        
+        frame = HistoricalFrame.for_window(settings.HISTORICAL_YEARS, settings.DAYS_RANGE)
         
         for year in range(current_year - settings.HISTORICAL_YEARS, current_year):
             for day_offset in range(-settings.DAYS_RANGE, settings.DAYS_RANGE + 1):
-                target_date = date.replace(year=year) + timedelta(days=day_offset)
-                df = await self.fetch_meteomatics_data(lat, lon, target_date)
-                if not df.empty:
-                    dfs.append(df)
+                target_date = same_day_in_year(date, year) + timedelta(days=day_offset)
+                with upstream("meteomatics"):
+                    await self.fetch_meteomatics_data(lat, lon, target_date, frame)
         
-        return dfs
+        # An empty frame usually means the provider failed; fetch again next time
+        if not frame.empty:
+            climatology_cache.set(cache_key, frame.to_bytes())
+        return frame
     
-    async def fetch_meteomatics_data(self, lat: float, lon: float, date: datetime) -> pd.DataFrame:
-        """Fetch data from Meteomatics API."""
-        # Implement Meteomatics API call
-        # For now, return dummy data
-        return pd.DataFrame()
-    
-    def calculate_hourly_probabilities(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate hourly weather probabilities."""
-        df = df.copy()
-        df['hour'] = df.index.hour
-        
-        def calc_probs(group):
-            rain = (group.get('precip_1h:mm', 0) > 0).mean() if 'precip_1h:mm' in group else 0
-            cloudy = (group.get('relative_humidity_2m:p', 0) > 70).mean() if 'relative_humidity_2m:p' in group else 0
-            sunny = ((group.get('precip_1h:mm', 0) == 0) & (group.get('relative_humidity_2m:p', 100) < 60)).mean() if 'precip_1h:mm' in group and 'relative_humidity_2m:p' in group else 0
-            high_wind = (group.get('wind_speed_10m:ms', 0) > 10).mean() if 'wind_speed_10m:ms' in group else 0
-            return pd.Series({
-                'rain_prob': rain * 100,
-                'cloudy_prob': cloudy * 100,
-                'sunny_prob': sunny * 100,
-                'high_wind_prob': high_wind * 100
-            })
-        
-        hourly_probs = df.groupby('hour').apply(calc_probs).reset_index()
-        return hourly_probs
-    
-    def calculate_summary(self, df: pd.DataFrame) -> Dict[str, float]:
-        """Calculate daily summary statistics."""
-        return {
-            "avg_rain_prob": 0.0,
-            "avg_cloudy_prob": 0.0,
-            "avg_sunny_prob": 0.0,
-            "avg_high_wind_prob": 0.0
+    def use_streaming(self) -> bool:
+        """Whether the configured window is long enough to aggregate while fetching."""
+        window_days = settings.HISTORICAL_YEARS * (2 * settings.DAYS_RANGE + 1)
+        return 0 < settings.STREAMING_WINDOW_DAYS < window_days
+    
+    async def aggregate_historical(
+        self,
+        lat: float,
+        lon: float,
+        date: datetime,
+        conditions: List[str] = []
+    ) -> HourlyAccumulator:
+        """Fetch the historical window one day at a time into running counters.
+        
+        One frame sized for a single year of the window is refilled and
+        folded per year, so memory does not grow with HISTORICAL_YEARS. Results match
+        ``get_historical_frame`` followed by the batch calculations. The
+        counters, not the observations, go to the climatology cache, so the
+        checklist is part of the key.
+        """
+        current_year = datetime.now().year
+        keep_days = settings.CONFIDENCE_INTERVAL_METHOD == "bootstrap"
+        cache_key = (
+            f"stream:{lat:.4f}:{lon:.4f}:{date:%m-%d}:{current_year}:{settings.HISTORICAL_YEARS}:"
+            f"{settings.DAYS_RANGE}:{keep_days}:{'|'.join(conditions)}"
+        )
+        cached = climatology_cache.get(cache_key)
+        if cached is not None:
+            return HourlyAccumulator.from_bytes(cached)
+        
+        accumulator = HourlyAccumulator(HOURLY_CONDITIONS, conditions, keep_days)
+        frame = HistoricalFrame.for_window(1, settings.DAYS_RANGE)
+        for year in range(current_year - settings.HISTORICAL_YEARS, current_year):
+            frame.clear()
+            for day_offset in range(-settings.DAYS_RANGE, settings.DAYS_RANGE + 1):
+                target_date = same_day_in_year(date, year) + timedelta(days=day_offset)
+                with upstream("meteomatics"):
+                    await self.fetch_meteomatics_data(lat, lon, target_date, frame)
+            accumulator.add(frame)
+        
+        if not accumulator.empty:
+            climatology_cache.set(cache_key, accumulator.to_bytes())
+        return accumulator
+    
+    async def fetch_meteomatics_data(self, lat: float, lon: float, date: datetime, frame: HistoricalFrame) -> int:
+        """Fetch one day from Meteomatics API into ``frame``. Returns rows written."""
+        # Implement Meteomatics API call, writing parsed columns with
+        # frame.reserve()/frame.append() rather than building DataFrames
+        # For now, return no data
+        return 0
+    
+    async def get_elevations(self, points: np.ndarray) -> Optional[np.ndarray]:
+        """Elevations in metres for an array of (lat, lon) points, or None if unknown."""
+        # Implement with an elevation API or a DEM lookup
+        # For now, elevation is unknown and interpolation is purely bilinear
+        return None
+    
+    async def interpolate_probabilities(
+        self,
+        lats,
+        lons,
+        date: datetime,
+        conditions: List[str] = []
+    ) -> Dict[str, np.ndarray]:
+        """Probabilities at many points from the surrounding grid cells.
+        
+        History is only fetched per grid node, and each node is fetched once
+        however many points share it. Returns hourly columns of shape
+        (points, 24), NaN where no surrounding cell observed that hour,
+        ``conditions`` of shape (points, len(conditions)) and ``checklist`` of
+        shape (points,).
+        """
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        nodes, weights = bilinear_weights(lats, lons)
+        unique_nodes, inverse = np.unique(nodes.reshape(-1, 2), axis=0, return_inverse=True)
+        inverse = inverse.reshape(weights.shape)
+        
+        # Nodes that only carry zero weight (points on a grid line) are skipped
+        needed = np.zeros(len(unique_nodes), dtype=bool)
+        needed[inverse[weights > 0]] = True
+        coordinates = [node_coordinates(row, column) for row, column in unique_nodes.tolist()]
+        frames = await asyncio.gather(*(
+            self.get_historical_frame(lat, lon, date)
+            for (lat, lon), use in zip(coordinates, needed) if use
+        ))
+        
+        tables = {column: np.full((len(unique_nodes), 24), np.nan) for column in HOURLY_CONDITIONS}
+        tables['conditions'] = np.full((len(unique_nodes), len(conditions)), np.nan)
+        tables['checklist'] = np.full(len(unique_nodes), np.nan)
+        for index, frame in zip(np.flatnonzero(needed), frames):
+            if frame.empty:
+                continue
+            counts, hits = self.hourly_counts(frame)
+            observed = counts > 0
+            for column in HOURLY_CONDITIONS:
+                tables[column][index, observed] = hits[column][observed] / counts[observed] * 100
+            for position, expression in enumerate(conditions):
+                tables['conditions'][index, position] = compile_condition(expression).probability(frame)
+            checklist = self.calculate_checklist_probability(frame, conditions)
+            if checklist is not None:
+                tables['checklist'][index] = checklist
+        
+        if settings.GRID_ELEVATION_SCALE_M > 0:
+            point_elevations = await self.get_elevations(np.column_stack([lats, lons]))
+            node_elevations = await self.get_elevations(np.array(coordinates))
+            if point_elevations is not None and node_elevations is not None:
+                weights = elevation_weights(
+                    weights, np.asarray(point_elevations), np.asarray(node_elevations)[inverse],
+                    settings.GRID_ELEVATION_SCALE_M
+                )
+        
+        return {name: interpolate(table[inverse], weights) for name, table in tables.items()}
+    
+    def point_probabilities(
+        self,
+        grid: Dict[str, np.ndarray],
+        index: int,
+        conditions: List[str]
+    ) -> Tuple[HourlyProbabilities, Dict[str, float], Optional[float]]:
+        """One point of ``interpolate_probabilities`` in the analysis layout."""
+        observed = np.flatnonzero(~np.isnan(grid['rain_prob'][index]))
+        hourly_probs = {'hour': observed}
+        for column in HOURLY_CONDITIONS:
+            hourly_probs[column] = grid[column][index, observed]
+        condition_probs = {
+            expression: float(value)
+            for expression, value in zip(conditions, grid['conditions'][index])
+            if not np.isnan(value)
         }
+        checklist = grid['checklist'][index]
+        return hourly_probs, condition_probs, None if np.isnan(checklist) else float(checklist)
+    
+    def hourly_counts(self, frame: HistoricalFrame) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Observations per hour of day and, per hourly column, how many matched."""
+        counts, hits = daily_counts(frame, HOURLY_CONDITIONS)
+        return counts.sum(axis=0), {column: daily.sum(axis=0) for column, daily in hits.items()}
+    
+    def calculate_hourly_probabilities(self, frame: HistoricalFrame) -> HourlyProbabilities:
+        """Calculate hourly weather probabilities with confidence intervals."""
+        return self.hourly_probabilities_from(hourly_statistics(*daily_counts(frame, HOURLY_CONDITIONS)))
+    
+    def hourly_probabilities_from(self, statistics: Counts) -> HourlyProbabilities:
+        """Hourly probabilities from per-day counts of every (column, hour).
+        
+        Adds ``<column>_low`` and ``<column>_high`` bounds for every column,
+        all computed in one vectorized interval call.
+        """
+        numerators, denominators = statistics
+        observed = np.flatnonzero(denominators[:, :24].sum(axis=0))
+        columns = list(HOURLY_CONDITIONS)
+        selected = (np.arange(len(columns))[:, None] * 24 + observed).ravel()
+        numerators, denominators = numerators[:, selected], denominators[:, selected]
+        low, high = proportion_interval(numerators, denominators)
+        
+        probs = {'hour': observed}
+        estimates = numerators.sum(axis=0) / denominators.sum(axis=0) * 100
+        for position, column in enumerate(columns):
+            part = slice(position * len(observed), (position + 1) * len(observed))
+            probs[column] = estimates[part]
+            probs[f'{column}_low'] = low[part]
+            probs[f'{column}_high'] = high[part]
+        return probs
+    
+    def calculate_condition_probabilities(self, frame: HistoricalFrame, conditions: List[str]) -> Dict[str, float]:
+        """Evaluate each checklist expression over the historical frame."""
+        return {expression: compile_condition(expression).probability(frame) for expression in conditions}
+    
+    def calculate_checklist_probability(self, frame: HistoricalFrame, conditions: List[str]) -> Optional[float]:
+        """Joint probability that every checklist condition holds at once."""
+        if not conditions or frame.empty:
+            return None
+        matches = np.logical_and.reduce([compile_condition(expression)(frame) for expression in conditions])
+        return float(matches.mean() * 100)
+    
+    async def get_community_observations(self, lat: float, lon: float, date: datetime) -> Dict:
+        """Observed-condition frequencies from the report rollups.
+        
+        Skipped when blending is disabled. Results are cached for
+        COMMUNITY_CACHE_SECONDS per grid cell and day, and the query runs in a
+        thread so it does not block the event loop.
+        """
+        if settings.COMMUNITY_BLEND_WEIGHT <= 0:
+            return {"reports": 0, "counts": {}, "frequencies": {}}
+        
+        cell_lat, cell_lon = snap_to_grid(lat, lon)
+        cache_key = f"{cell_lat:.4f}:{cell_lon:.4f}:{date:%m-%d}:{datetime.utcnow().year}"
+        cached = community_cache.get(cache_key)
+        if cached is not None:
+            return orjson.loads(cached)
+        
+        def query() -> Dict:
+            db = SessionLocal()
+            try:
+                return observed_frequencies(db, lat, lon, date)
+            finally:
+                db.close()
+        
+        community = await asyncio.to_thread(query)
+        community_cache.set(cache_key, orjson.dumps(community), ttl=settings.COMMUNITY_CACHE_SECONDS)
+        return community
+    
+    def blend_community_observations(self, hourly_probs: HourlyProbabilities, community: Dict) -> HourlyProbabilities:
+        """Shift each hourly probability towards the reported frequency.
+        
+        Reports carry no hour, so the same daily frequency is blended into every
+        hour with weight COMMUNITY_BLEND_WEIGHT, once the window holds at least
+        COMMUNITY_MIN_REPORTS reports.
+        """
+        weight = settings.COMMUNITY_BLEND_WEIGHT
+        if weight <= 0 or community["reports"] < settings.COMMUNITY_MIN_REPORTS or len(hourly_probs['hour']) == 0:
+            return hourly_probs
+        
+        frequencies = community["frequencies"]
+        blended = dict(hourly_probs)
+        for column, condition in HOURLY_CONDITIONS.items():
+            frequency = frequencies.get(condition, 0.0)
+            # Interval bounds move with their estimate
+            for key in (column, f'{column}_low', f'{column}_high'):
+                if key in hourly_probs:
+                    blended[key] = (1 - weight) * hourly_probs[key] + weight * frequency
+        return blended
     
-    def generate_chart(self, hourly_probs: pd.DataFrame, location: str, date: str) -> str:
+    def calculate_summary(self, frame: HistoricalFrame) -> Dict[str, float]:
+        """Calculate daily summary statistics with confidence intervals."""
+        statistics = summary_statistics(*daily_counts(frame, HOURLY_CONDITIONS))
+        return self.summary_from(statistics, frame.slices, len(frame))
+    
+    def summary_from(self, statistics: Counts, days: int, observations: int) -> Dict[str, float]:
+        """Summary from per-day counts of matching hours and matching days.
+        
+        ``avg_<column>`` is the share of all observed hours matching the
+        condition and ``<condition>_day_prob`` the share of days on which it
+        held at least once, each with ``_low`` and ``_high`` bounds.
+        """
+        numerators, denominators = statistics
+        low, high = proportion_interval(numerators, denominators)
+        estimates = numerators.sum(axis=0) / denominators.sum(axis=0) * 100
+        names = [
+            name
+            for column, condition in HOURLY_CONDITIONS.items()
+            for name in (f"avg_{column}", f"{condition}_day_prob")
+        ]
+        
+        summary = {"days": float(days), "observations": float(observations)}
+        for name, estimate, lower, upper in zip(names, estimates, low, high):
+            summary[name] = float(estimate)
+            summary[f"{name}_low"] = float(lower)
+            summary[f"{name}_high"] = float(upper)
+        return summary
+    
+    def generate_chart(self, hourly_probs: HourlyProbabilities, location: str, date: str) -> str:
         """Generate matplotlib chart and return as base64."""
-        if hourly_probs.empty:
+        if len(hourly_probs['hour']) == 0:
             return None
         
-        fig, ax = plt.subplots(figsize=(12, 6))
+        # Figure objects need no pyplot state and are safe across threads
+        fig = _figure_class()(figsize=(12, 6))
+        ax = fig.subplots()
         ax.plot(hourly_probs['hour'], hourly_probs['rain_prob'], marker='o', label='Rain %')
         ax.plot(hourly_probs['hour'], hourly_probs['cloudy_prob'], marker='s', label='Cloudy %')
         ax.plot(hourly_probs['hour'], hourly_probs['sunny_prob'], marker='^', label='Sunny %')
+        for column in ('rain_prob', 'cloudy_prob', 'sunny_prob'):
+            if f'{column}_low' in hourly_probs:
+                ax.fill_between(hourly_probs['hour'], hourly_probs[f'{column}_low'], hourly_probs[f'{column}_high'], alpha=0.15)
         
         ax.set_xlabel('Hour')
         ax.set_ylabel('Probability (%)')
@@ -138,22 +447,51 @@ class WeatherService:
         ax.grid(True, alpha=0.3)
         
         buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', bbox_inches='tight')
+        fig.savefig(buffer, format='png', bbox_inches='tight')
         buffer.seek(0)
         image_base64 = base64.b64encode(buffer.read()).decode()
-        plt.close()
         
         return image_base64
     
-    def generate_summary_text(self, summary: Dict, conditions: List[str]) -> str:
+    def generate_summary_text(
+        self,
+        summary: Dict,
+        condition_probs: Dict[str, float],
+        checklist_prob: Optional[float] = None
+    ) -> str:
         """Generate human-readable summary text."""
-        return "Weather analysis complete. Check the detailed probabilities for more information."
+        rain_day = ""
+        if "rain_day_prob" in summary:
+            rain_day = (
+                f"Rain fell on {summary['rain_day_prob']:.0f}% of comparable days "
+                f"({summary['rain_day_prob_low']:.0f}-{summary['rain_day_prob_high']:.0f}% "
+                f"at {settings.CONFIDENCE_LEVEL:.0%} confidence)."
+            )
+        if not condition_probs:
+            return rain_day or "Weather analysis complete. Check the detailed probabilities for more information."
+        
+        parts = [f"'{expression}' held {prob:.0f}% of the time" for expression, prob in condition_probs.items()]
+        text = "Historically, " + "; ".join(parts) + "."
+        if checklist_prob is not None and len(condition_probs) > 1:
+            text += f" All conditions held together {checklist_prob:.0f}% of the time."
+        if rain_day:
+            text += " " + rain_day
+        return text
     
-    def calculate_confidence(self, data_points: int) -> str:
-        """Calculate confidence level based on available data."""
-        if data_points >= 10:
+    def calculate_confidence(self, summary: Dict[str, float]) -> str:
+        """Rate the analysis by its widest interval on the average probabilities."""
+        widths = [
+            summary[f"avg_{column}_high"] - summary[f"avg_{column}_low"]
+            for column in HOURLY_CONDITIONS
+            if f"avg_{column}_low" in summary
+        ]
+        widths = [width for width in widths if not np.isnan(width)]
+        if not widths:
+            return "Low"
+        half_width = max(widths) / 2
+        if half_width <= 10:
             return "High"
-        elif data_points >= 5:
+        elif half_width <= 20:
             return "Medium"
         else:
             return "Low"
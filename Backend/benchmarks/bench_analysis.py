@@ -0,0 +1,96 @@
+"""Micro-benchmarks for the weather analysis pipeline.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_analysis --years 5 --days 2 --repeat 50
+"""
+import argparse
+import asyncio
+import os
+import tracemalloc
+from datetime import datetime
+from time import perf_counter
+from typing import Callable, List
+
+import numpy as np
+
+# Community report lookups run against an empty in-memory database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.core.config import settings
+from app.db.database import Base, engine
+from benchmarks.report import print_table, summarize
+from benchmarks.synthetic import SyntheticWeatherService, make_frame
+
+
+def time_calls(fn: Callable, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        samples.append(perf_counter() - start)
+    return samples
+
+
+def peak_allocation_mb(fn: Callable) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=settings.HISTORICAL_YEARS, help="historical years per analysis")
+    parser.add_argument("--days", type=int, default=settings.DAYS_RANGE, help="days either side of the target date")
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per benchmark")
+    parser.add_argument("--cache", action="store_true", help="serve repeated fetches from the shared climatology cache")
+    parser.add_argument("--points", type=int, default=1000, help="points per gridded interpolation")
+    parser.add_argument("--conditions", nargs="*", default=["temp between 18 and 28 and wind < 8", "not rain"])
+    args = parser.parse_args()
+
+    settings.HISTORICAL_YEARS = args.years
+    settings.DAYS_RANGE = args.days
+    settings.SHARED_CACHE_ENABLED = args.cache
+    Base.metadata.create_all(bind=engine)
+    service = SyntheticWeatherService()
+    frame = make_frame(args.years, args.days)
+    hourly = service.calculate_hourly_probabilities(frame)
+
+    def analyze(include_chart: bool):
+        return asyncio.run(service.analyze_weather_probability(
+            location="Benchmark",
+            start_date="2024-06-15",
+            conditions_checklist=args.conditions,
+            include_chart=include_chart
+        ))
+
+    # Points spread over one degree square, i.e. a few dozen grid cells
+    rng = np.random.default_rng(0)
+    lats, lons = 15 + rng.random(args.points), 73 + rng.random(args.points)
+
+    def interpolate():
+        return asyncio.run(service.interpolate_probabilities(lats, lons, datetime(2024, 6, 15), args.conditions))
+
+    benchmarks = [
+        ("calculate_hourly_probabilities", lambda: service.calculate_hourly_probabilities(frame), args.repeat),
+        ("calculate_condition_probabilities", lambda: service.calculate_condition_probabilities(frame, args.conditions), args.repeat),
+        ("generate_chart", lambda: service.generate_chart(hourly, "Benchmark", "2024-06-15"), max(1, args.repeat // 5)),
+        ("analyze_weather_probability (no chart)", lambda: analyze(False), args.repeat),
+        ("analyze_weather_probability", lambda: analyze(True), max(1, args.repeat // 5)),
+        (f"interpolate_probabilities ({args.points} points)", interpolate, max(1, args.repeat // 5)),
+    ]
+
+    print(f"window: {args.years} years x {2 * args.days + 1} days = {len(frame)} hourly rows\n")
+    rows = []
+    for name, fn, repeat in benchmarks:
+        fn()  # warm up imports and caches
+        row = summarize(name, time_calls(fn, repeat))
+        row["note"] = f"peak alloc {peak_allocation_mb(fn):.2f} MB"
+        rows.append(row)
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
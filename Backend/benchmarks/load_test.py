@@ -0,0 +1,126 @@
+"""API load test for the weather, auth and reports endpoints.
+
+By default the app runs in-process against an in-memory SQLite database, with
+the weather provider replaced by the synthetic generator, so results reflect
+the application alone. Run from the Backend directory:
+
+    python -m benchmarks.load_test --requests 500 --concurrency 20
+
+Pass --url to load an already running server instead (its provider and
+database are used as configured).
+"""
+import argparse
+import asyncio
+import os
+import random
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.report import print_table, summarize
+
+USER = {"email": "loadtest@example.com", "username": "loadtest", "password": "loadtest-password"}
+
+
+def in_process_client() -> httpx.AsyncClient:
+    # Must be configured before the app modules read settings
+    os.environ["DATABASE_URL"] = "sqlite://"
+    from app.db.database import Base, engine
+    from app.services.weather_service import WeatherService
+    from benchmarks.synthetic import SyntheticWeatherService
+    import main
+
+    WeatherService.fetch_meteomatics_data = SyntheticWeatherService.fetch_meteomatics_data
+    Base.metadata.create_all(bind=engine)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest")
+
+
+async def login(client: httpx.AsyncClient) -> Dict[str, str]:
+    await client.post("/auth/signup", json=USER)
+    response = await client.post("/auth/login", data={"username": USER["username"], "password": USER["password"]})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_scenario(
+    name: str,
+    call: Callable[[int], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int
+) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = perf_counter()
+            response = await call(i)
+            samples.append(perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = perf_counter() - start
+
+    row = summarize(name, samples)
+    # Throughput under concurrency is completed requests over wall time
+    row["per_sec"] = requests / elapsed
+    row["note"] = f"{errors} errors" if errors else ""
+    return row
+
+
+async def main(args):
+    client = httpx.AsyncClient(base_url=args.url, timeout=60) if args.url else in_process_client()
+    async with client:
+        headers = await login(client)
+
+        def weather(i: int):
+            day = 1 + i % 28
+            return client.post("/api/weather-probability", headers=headers, json={
+                "location": "Margao, Goa",
+                "start_date": f"2024-06-{day:02d}",
+                "conditions_checklist": ["temp between 18 and 28 and wind < 8"],
+                "include_chart": args.chart,
+            })
+
+        def auth(i: int):
+            return client.post("/auth/login", data={"username": USER["username"], "password": USER["password"]})
+
+        def reports(i: int):
+            if i % 5 == 0:
+                return client.post("/api/reports", headers=headers, json={
+                    "location": "Margao, Goa",
+                    "latitude": 15.27 + random.random() / 10,
+                    "longitude": 73.95 + random.random() / 10,
+                    "report_date": "2024-06-15T12:00:00",
+                    "weather_conditions": {"rain": i % 2 == 0},
+                    "description": "load test",
+                })
+            return client.get("/api/reports", headers=headers, params={"location": "Goa"})
+
+        scenarios = {
+            "POST /api/weather-probability": (weather, args.requests),
+            # bcrypt dominates login; fewer requests keep the run short
+            "POST /auth/login": (auth, max(1, args.requests // 10)),
+            "GET/POST /api/reports (4:1)": (reports, args.requests),
+        }
+        rows = []
+        for name, (call, requests) in scenarios.items():
+            await call(0)  # warm up
+            rows.append(await run_scenario(name, call, requests, args.concurrency))
+
+    print(f"concurrency {args.concurrency}, target {args.url or 'in-process app'}\n")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--chart", action="store_true", help="render charts in weather requests")
+    parser.add_argument("--url", help="base URL of a running server")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,39 @@
+import resource
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+
+def summarize(name: str, samples: List[float], items: int = 1) -> Dict:
+    """Latency percentiles (ms) and throughput for a list of timings in seconds."""
+    timings = np.asarray(samples) * 1000
+    total = float(np.sum(samples))
+    return {
+        "name": name,
+        "runs": len(samples),
+        "mean_ms": float(timings.mean()),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "per_sec": len(samples) * items / total if total else float("inf"),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def print_table(rows: List[Dict]):
+    header = f"{'benchmark':<40} {'runs':>6} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'per sec':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        extra = f"  {row['note']}" if row.get("note") else ""
+        print(
+            f"{row['name']:<40} {row['runs']:>6} {row['mean_ms']:>10.3f} {row['p50_ms']:>10.3f} "
+            f"{row['p99_ms']:>10.3f} {row['per_sec']:>10.1f}{extra}"
+        )
+    print(f"\npeak RSS: {peak_rss_mb():.1f} MB")
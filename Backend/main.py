@@ -1,24 +1,58 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 
-from app.api.routes import weather, trips, recommendations, reports, profile, export, locations, auth
+from app.api.routes import weather, trips, recommendations, reports, profile, export, locations, auth, live
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.observability import MetricsMiddleware, instrument_engine, render_metrics, setup_tracing
+from app.core.revocation import denylist
 from app.db.database import engine, Base
+from app.services.live_dashboard import hub
+
+if settings.PRELOAD_ANALYSIS:
+    # Import the analysis stack before a pre-forking server starts its workers,
+    # so they share those pages copy-on-write instead of importing it each
+    from app.services.weather_service import preload_analysis_stack
+    preload_analysis_stack()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Create database tables on startup
     Base.metadata.create_all(bind=engine)
+    setup_tracing()
+    # Load revoked tokens and follow revocations made by other workers
+    denylist.start()
+    
+    # Periodically re-analyze upcoming trips
+    watcher_task = None
+    if settings.TRIP_WATCH_ENABLED:
+        from app.services.trip_watcher import TripWatcher
+        watcher_task = asyncio.create_task(TripWatcher().run_forever())
+    
+    # Periodically move old reports to the Parquet archive
+    archive_task = None
+    if settings.REPORTS_ARCHIVE_INTERVAL_HOURS > 0:
+        from app.services.report_archive import ArchiveJob
+        archive_task = asyncio.create_task(ArchiveJob().run_forever())
+    
     yield
-    # Cleanup on shutdown (if needed)
+    
+    # Cleanup on shutdown
+    for task in (watcher_task, archive_task):
+        if task:
+            task.cancel()
+    hub.close()
 
 app = FastAPI(
     title="Weather Analysis API",
     description="API for weather probability analysis, trip planning, and recommendations",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -30,6 +64,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(weather.router, prefix="/api", tags=["Weather"])
@@ -39,6 +80,7 @@ app.include_router(recommendations.router, prefix="/api", tags=["Recommendations
 app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
 app.include_router(profile.router, prefix="/api/profile", tags=["Profile"])
 app.include_router(export.router, prefix="/api/export", tags=["Export"])
+app.include_router(live.router, prefix="/api/live", tags=["Live"])
 
 @app.get("/")
 async def root():
@@ -48,11 +90,17 @@ async def root():
         "docs": "/docs"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    # Development server; use serve.py for multi-worker production serving
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
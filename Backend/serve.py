@@ -0,0 +1,142 @@
+"""Production entry point: a pre-forking supervisor running uvicorn workers.
+
+    python serve.py
+
+The supervisor binds the listening socket, optionally imports the app once so
+workers share its pages copy-on-write, forks ``WORKERS`` uvicorn servers on
+that socket and restarts any that die. SIGTERM or SIGINT shuts the workers
+down gracefully, killing those still busy after ``GRACEFUL_TIMEOUT`` seconds.
+"""
+import gc
+import logging
+import os
+import signal
+import socket
+import tempfile
+import time
+from typing import Dict
+
+from app.core.config import settings
+
+logger = logging.getLogger("serve")
+
+# Prometheus needs a directory shared by all workers, set before it is imported
+if settings.METRICS_ENABLED and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="weather-api-metrics-")
+
+import uvicorn
+
+
+def bind_socket() -> socket.socket:
+    family = socket.AF_INET6 if ":" in settings.HOST else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((settings.HOST, settings.PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.children: Dict[int, int] = {}
+        self.stopping = False
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = index
+            return
+
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            # Background jobs such as the trip watcher run in one worker only
+            if index != 0:
+                settings.TRIP_WATCH_ENABLED = False
+                settings.REPORTS_ARCHIVE_INTERVAL_HOURS = 0
+            config = uvicorn.Config(
+                self.app,
+                timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT,
+                proxy_headers=True
+            )
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("Worker %s crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def reap(self):
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            index = self.children.pop(pid, None)
+            if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+                from prometheus_client import multiprocess
+                multiprocess.mark_process_dead(pid)
+            if index is not None and not self.stopping:
+                logger.warning("Worker %s exited with status %s; restarting", pid, status)
+                self.spawn(index)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        for index in range(self.workers):
+            self.spawn(index)
+        logger.info("Serving on %s:%s with %s workers", settings.HOST, settings.PORT, self.workers)
+
+        while not self.stopping:
+            time.sleep(0.5)
+            self.reap()
+        self.shutdown()
+
+    def shutdown(self):
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + settings.GRACEFUL_TIMEOUT + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.children):
+            logger.warning("Worker %s did not stop in time; killing", pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.children.pop(pid)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    workers = settings.WORKERS or os.cpu_count() or 1
+    if workers > 1 and not settings.SHARED_CACHE_ENABLED and not settings.REVOCATION_REDIS_URL:
+        raise SystemExit(
+            "Token revocation needs SHARED_CACHE_ENABLED or REVOCATION_REDIS_URL "
+            "to reach every worker; enable one or set WORKERS=1"
+        )
+
+    # Create tables once here rather than racing to do it in every worker
+    from app.db.database import Base, engine
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    if settings.PRELOAD_APP:
+        import main as application
+        app = application.app
+        # Keep the preloaded objects out of GC passes so their pages stay shared
+        gc.freeze()
+    else:
+        app = "main:app"
+
+    Supervisor(app, bind_socket(), workers).run()
+
+
+if __name__ == "__main__":
+    main()